@@ -0,0 +1,335 @@
+import asyncio
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, List, Optional, Set, Tuple
+from connect import DEFAULT_COMMANDS
+from crawler import CDPCrawler
+from parse_pool import create_parse_pool, parse_outputs_timed, timed_parse
+from profiles import AUTODETECT
+from metrics import Metrics
+from data import PENDING, IN_PROGRESS, DONE, FAILED
+
+try:
+    import asyncssh
+except ImportError:  # Only needed for --engine async
+    asyncssh = None
+
+# Last line of shell output once a command has finished, e.g. "core-sw01#" or "core-sw01>"
+PROMPT_PATTERN = re.compile(r'(?:^|\n)([^\s#>]+[#>])\s*$')
+PAGING_COMMAND = 'terminal length 0'
+
+class AsyncDeviceConnector:
+    """Collects raw show command output from an interactive shell over asyncssh.
+
+    Classic IOS serves one exec request per SSH connection, so the
+    commands are typed into one shell on a PTY rather than run as
+    separate exec channels.
+    """
+
+    def __init__(self, config: Dict[str, Any], metrics: Optional[Metrics] = None):
+        if asyncssh is None:
+            raise RuntimeError("The async engine requires asyncssh (pip install asyncssh)")
+        self.config = config
+        self.metrics = metrics or Metrics()
+        self.timeout = config['crawler'].get('timeout', 30)
+        self.logger = logging.getLogger(__name__)
+        jump_config = config.get('jump_host') or {}
+        self.jump_host = jump_config if jump_config.get('host') else None
+        self._tunnel = None
+        self._tunnel_lock = asyncio.Lock()
+
+    async def _jump_tunnel(self) -> Optional[Any]:
+        """Return the shared connection to the jump host that device sessions tunnel through, or None."""
+        if self.jump_host is None:
+            return None
+        async with self._tunnel_lock:
+            if self._tunnel is None or self._tunnel.is_closed():
+                key_file = self.jump_host.get('key_file')
+                self._tunnel = await asyncio.wait_for(
+                    asyncssh.connect(
+                        self.jump_host['host'],
+                        port=self.jump_host.get('port', 22),
+                        username=self.jump_host.get('username'),
+                        password=self.jump_host.get('password'),
+                        client_keys=[key_file] if key_file else (),
+                        keepalive_interval=self.jump_host.get('keepalive', 30),
+                        known_hosts=None
+                    ),
+                    timeout=self.timeout
+                )
+                self.logger.info(f"Connected to jump host {self.jump_host['host']}")
+            return self._tunnel
+
+    async def close(self) -> None:
+        """Close the jump host connection, if one was opened."""
+        if self._tunnel is not None:
+            self._tunnel.close()
+            await self._tunnel.wait_closed()
+            self._tunnel = None
+
+    async def collect(self, device_info: Dict[str, Any], commands: Optional[Dict[str, str]] = None,
+                      credentials: Optional[List[Dict[str, Any]]] = None) -> Tuple[Optional[Dict[str, str]], bool]:
+        """Log in with the first credential profile the device accepts and return its output for each command.
+
+        Like DeviceConnector.login, also returns whether every profile was
+        rejected, in which case retrying cannot help.
+        """
+        connection = None
+        for profile in credentials or [device_info]:
+            started = time.perf_counter()
+            try:
+                tunnel = await self._jump_tunnel()
+                connection = await asyncio.wait_for(
+                    asyncssh.connect(
+                        device_info['host'],
+                        port=device_info.get('port', 22),
+                        username=profile['username'],
+                        password=profile['password'],
+                        tunnel=tunnel,
+                        known_hosts=None
+                    ),
+                    timeout=self.timeout
+                )
+            except asyncssh.PermissionDenied:
+                self.logger.info(f"Credential profile {profile.get('name')} rejected by {device_info['host']}")
+                self.metrics.inc('login_rejections')
+                continue
+            except Exception as e:
+                self.logger.error(f"Failed to connect to {device_info['host']}: {str(e)}")
+                self.metrics.inc('failures', reason='connect')
+                return None, False
+            finally:
+                self.metrics.observe('connect', time.perf_counter() - started)
+            device_info.update(username=profile['username'], password=profile['password'],
+                               credential=profile.get('name'))
+            break
+        if connection is None:
+            self.logger.error(f"No credential profile was accepted by {device_info['host']}")
+            self.metrics.inc('failures', reason='auth')
+            return None, True
+
+        try:
+            outputs = {}
+            async with connection:
+                shell = await asyncio.wait_for(connection.create_process(term_type='vt100'), timeout=self.timeout)
+                prompt = PROMPT_PATTERN.search(await self._read_to_prompt(shell)).group(1)
+                await self._send_command(shell, PAGING_COMMAND, prompt)
+                for name, command in (commands or DEFAULT_COMMANDS).items():
+                    started = time.perf_counter()
+                    outputs[name] = await self._send_command(shell, command, prompt)
+                    self.metrics.observe('command', time.perf_counter() - started, command=name)
+                shell.stdin.write('exit\n')
+            self.logger.info(f"Collected output from {device_info['host']}")
+            return outputs, False
+        except Exception as e:
+            self.logger.error(f"Error gathering device information from {device_info['host']}: {str(e)}")
+            self.metrics.inc('failures', reason='command')
+            return None, False
+
+    async def _read_to_prompt(self, shell: Any, prompt: Optional[str] = None) -> str:
+        """Read shell output until a prompt (the given one, if any) ends it; raises if the session closes."""
+        async def read() -> str:
+            output = ''
+            while True:
+                chunk = await shell.stdout.read(65536)
+                if not chunk:
+                    raise ConnectionError("session closed before the prompt")
+                output += chunk.replace('\r', '')
+                match = PROMPT_PATTERN.search(output)
+                if match and match.group(1) == (prompt or match.group(1)):
+                    return output
+        return await asyncio.wait_for(read(), timeout=self.timeout)
+
+    async def _send_command(self, shell: Any, command: str, prompt: str) -> str:
+        """Type a command into the shell and return its output, without the echoed command or the prompt."""
+        shell.stdin.write(command + '\n')
+        output = await self._read_to_prompt(shell, prompt)
+        output = output[:output.rstrip().rfind(prompt)]
+        # The shell echoes the command line before the output
+        return output.split('\n', 1)[1] if '\n' in output else ''
+
+class AsyncCDPCrawler(CDPCrawler):
+    """Crawler that keeps many SSH sessions in flight on one asyncio event loop."""
+
+    def __init__(self, config_path: str, config: Optional[Dict[str, Any]] = None,
+                 async_connector: Optional[AsyncDeviceConnector] = None):
+        super().__init__(config_path, config)
+        crawler_config = self.config['crawler']
+        self.max_sessions = crawler_config.get('max_sessions', 200)
+        self.parse_workers = crawler_config.get('parse_workers', 4)
+        self.async_connector = async_connector or AsyncDeviceConnector(self.config, self.metrics)
+        self.tasks: Set[asyncio.Task] = set()
+        self.failure: Optional[BaseException] = None  # Why the crawl ended early, if it failed
+        self.active_sessions = 0
+        self.metrics.track('active_sessions', lambda: self.active_sessions)
+        self.metrics.track('device_tasks', lambda: len(self.tasks))
+
+    def start(self, resume: bool = False) -> None:
+        """Start the crawling process, optionally resuming the last interrupted crawl."""
+        completed = False
+        try:
+            if self.incremental:
+                self.fingerprints = self.db_manager.load_fingerprints()
+                self.logger.info(f"Incremental crawl: {len(self.fingerprints)} stored device fingerprints")
+            self._begin_run(resume)
+            self.db_manager.start_writer()
+            asyncio.run(self._crawl(self._initial_targets(resume)))
+            if self.failure is not None:
+                self.logger.error(f"Crawling failed: {str(self.failure)}; run with --resume to continue")
+            elif self.is_running:
+                completed = True
+                self.logger.info("Crawling completed")
+            else:
+                self.logger.info("Crawling stopped; run with --resume to continue")
+        except KeyboardInterrupt:
+            self.logger.info("Crawling interrupted by user")
+        except Exception as e:
+            self.failure = e
+            raise
+        finally:
+            self.connector.close()
+            self.db_manager.stop_writer()
+            self._end_run(completed, failed=self.failure is not None)
+
+    async def _crawl(self, targets: List[Dict[str, Any]]) -> None:
+        """Crawl from the initial targets until no device tasks remain."""
+        self.semaphore = asyncio.Semaphore(self.max_sessions)
+        self.executor = ThreadPoolExecutor(max_workers=self.parse_workers, thread_name_prefix="parse")
+        self.parse_pool = create_parse_pool(self.config, self.parse_processes)
+        try:
+            for device_info in targets:
+                self._schedule(device_info)
+            while self.tasks and self.is_running:
+                await asyncio.wait(list(self.tasks), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Cancelled tasks still record their frontier status on the executor, so it outlives them
+            tasks = list(self.tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.async_connector.close()
+            self.executor.shutdown(wait=True)
+            if self.parse_pool:
+                self.parse_pool.shutdown(wait=True)
+                self.parse_pool = None
+
+    def _schedule(self, device_info: Dict[str, Any]) -> None:
+        """Create a task for a device already marked in the frontier."""
+        task = asyncio.ensure_future(self._process(device_info))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _process(self, device_info: Dict[str, Any]) -> None:
+        """Collect, parse, store and expand a single device."""
+        loop = asyncio.get_running_loop()
+        ip = device_info['host']
+        status = FAILED
+        try:
+            await loop.run_in_executor(self.executor, self.db_manager.enqueue_frontier, ip, IN_PROGRESS)
+            outputs = await self._collect_with_retries(device_info)
+            if not outputs:
+                return
+            await loop.run_in_executor(self.executor, self._store_outputs, device_info, outputs)
+
+            # TextFSM parsing is CPU-bound, so it runs in the process pool, off the event loop
+            device_data = await loop.run_in_executor(
+                self.executor, self._unchanged_device_data, device_info, outputs
+            )
+            changed = not device_data
+            if changed:
+                if self.parse_pool is None:
+                    device_data, parse_seconds = await loop.run_in_executor(
+                        self.executor, timed_parse, self.connector, device_info, outputs
+                    )
+                else:
+                    device_data, parse_seconds = await loop.run_in_executor(
+                        self.parse_pool, parse_outputs_timed, device_info, outputs
+                    )
+                self.metrics.observe('parse', parse_seconds)
+            if not device_data:
+                self.metrics.inc('failures', reason='parse')
+                return
+
+            # enqueue_address, like enqueue_device, blocks when the write queue is full
+            if await loop.run_in_executor(self.executor, self._register_identity, device_info, device_data):
+                status = DONE
+                return
+            if changed:
+                await loop.run_in_executor(self.executor, self.db_manager.enqueue_device, device_data)
+            await loop.run_in_executor(self.executor, self.db_manager.enqueue_run_device, self.run_id, device_data)
+            status = DONE
+
+            targets = self._discover_neighbors(device_data, device_info.get('depth', 0) + 1)
+            await loop.run_in_executor(self.executor, self._record_pending, targets)
+            for neighbor_info in targets:
+                self._schedule(neighbor_info)
+        except BrokenProcessPool as e:
+            # Every later parse would fail the same way, so the crawl stops instead of failing each device
+            self.logger.error(f"Parse pool failed while processing device {ip}: {str(e)}")
+            self.failure = e
+            self.is_running = False
+        except Exception as e:
+            self.logger.error(f"Error processing device {ip}: {str(e)}")
+        finally:
+            self.metrics.inc('devices', status=status)
+            await loop.run_in_executor(self.executor, self.db_manager.enqueue_frontier, ip, status)
+
+    async def _collect_with_retries(self, device_info: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """Collect output under the session limit, retrying with exponential backoff."""
+        loop = asyncio.get_running_loop()
+        ip = device_info['host']
+        for attempt in range(self.scheduler.retry_count + 1):
+            if attempt:
+                # Back off without holding a session slot
+                self.metrics.inc('retries')
+                await asyncio.sleep(self.scheduler.delay(attempt))
+            async with self.semaphore:
+                self.logger.info(f"Processing device: {ip}")
+                if device_info['device_type'] == AUTODETECT and not await self._detect_device_type(device_info):
+                    continue
+                commands = self.connector.commands(device_info['device_type'])
+                credentials = self.credentials.candidates(ip, device_info.get('platform', ''))
+                started = time.perf_counter()
+                self.active_sessions += 1
+                try:
+                    outputs, rejected = await asyncio.wait_for(
+                        self.async_connector.collect(device_info, commands, credentials),
+                        timeout=self.watchdog.deadline
+                    )
+                except asyncio.TimeoutError:
+                    self.logger.warning(f"Device {ip} exceeded the {self.watchdog.deadline}s deadline")
+                    self.metrics.inc('failures', reason='deadline')
+                    with self.stats_lock:
+                        self.stragglers += 1
+                    return None
+                finally:
+                    self.active_sessions -= 1
+                    self.metrics.observe('device', time.perf_counter() - started)
+            if outputs:
+                await loop.run_in_executor(self.executor, self._learn_credential, device_info)
+                return outputs
+            # Retrying cannot help once every credential profile has been refused, and risks a lockout
+            if rejected or not self.is_running:
+                break
+        return None
+
+    async def _detect_device_type(self, device_info: Dict[str, Any]) -> bool:
+        """Autodetect a device's type with Netmiko on a thread and cache it for its platform."""
+        loop = asyncio.get_running_loop()
+        # SSHDetect blocks for several seconds, so it gets the default executor rather than self.executor
+        credentials = self.credentials.candidates(device_info['host'], device_info.get('platform', ''))
+        device_type = await loop.run_in_executor(None, self.connector.detect_device_type, device_info, credentials)
+        if not device_type:
+            return False
+        device_info['device_type'] = device_type
+        await loop.run_in_executor(self.executor, self._learn_device_type, device_info)
+        await loop.run_in_executor(self.executor, self._learn_credential, device_info)
+        return True
+
+    def _record_pending(self, targets: List[Dict[str, Any]]) -> None:
+        """Add newly discovered devices to the persistent frontier."""
+        for neighbor_info in targets:
+            self.db_manager.enqueue_frontier(neighbor_info['host'], PENDING, neighbor_info)
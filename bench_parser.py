@@ -0,0 +1,145 @@
+import click
+import glob
+import json
+import os
+import sys
+import time
+import textfsm
+from rich.console import Console
+from rich.table import Table
+from parser import Parser, DEFAULT_TEMPLATES
+from fast_parser import parse_show_version, parse_cdp_neighbors_detail
+
+console = Console()
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "samples")
+
+# Recorded outputs (cdp_*.txt, version_*.txt) with the TextFSM rows expected for each (*.json)
+GOLDEN_DIR = os.path.join(SAMPLES_DIR, "golden")
+GOLDEN_PARSERS = {
+    'cdp': ('show_cdp_neighbors', parse_cdp_neighbors_detail),
+    'version': ('show_version', parse_show_version),
+}
+
+def load_sample(name: str) -> str:
+    """Read a recorded command output from the samples directory."""
+    with open(os.path.join(SAMPLES_DIR, name)) as f:
+        return f.read()
+
+def parse_uncached(version_output: str, cdp_output: str) -> None:
+    """Parse one device the way Parser did before the template registry."""
+    for name, output in (('show_version', version_output), ('show_cdp_neighbors', cdp_output)):
+        with open(DEFAULT_TEMPLATES[name]) as f:
+            textfsm.TextFSM(f).ParseText(output)
+
+def parse_cached(parser: Parser, version_output: str, cdp_output: str) -> None:
+    """Parse one device using the compiled template registry."""
+    parser.parse_version(version_output)
+    parser.parse_cdp_neighbors(cdp_output)
+
+def parse_textfsm(name: str, output: str) -> list:
+    """Parse output with a freshly compiled built-in template, the reference for the fast parsers."""
+    with open(DEFAULT_TEMPLATES[name]) as f:
+        return textfsm.TextFSM(f).ParseTextToDicts(output)
+
+def large_cdp_output(neighbors: int) -> str:
+    """Build show cdp neighbors detail output for a core switch with many neighbors."""
+    entry = load_sample("show_cdp_neighbors_detail.txt").split("-------------------------\n")[1]
+    return "".join(
+        "-------------------------\n" + entry
+        .replace("dist-sw01", f"dist-sw{index:04d}")
+        .replace("10.10.1.2", f"10.10.{index // 250}.{index % 250 + 2}")
+        .replace("GigabitEthernet1/0/49", f"GigabitEthernet{index // 48 + 1}/0/{index % 48 + 1}")
+        for index in range(neighbors)
+    )
+
+def check_golden(update: bool) -> bool:
+    """Compare the fast parsers and TextFSM with the golden rows; return True if all agree."""
+    table = Table(title="Golden corpus")
+    table.add_column("Sample", style="cyan")
+    table.add_column("Rows", justify="right")
+    table.add_column("Result")
+    ok = True
+    for path in sorted(glob.glob(os.path.join(GOLDEN_DIR, "*.txt"))):
+        kind = os.path.basename(path).split("_", 1)[0]
+        template_name, fast_parser = GOLDEN_PARSERS[kind]
+        # newline='' keeps CRLF samples intact, as Netmiko can return them
+        with open(path, newline='') as f:
+            output = f.read()
+        expected_path = path[:-len(".txt")] + ".json"
+        reference = parse_textfsm(template_name, output)
+        if update:
+            with open(expected_path, 'w') as f:
+                json.dump(reference, f, indent=2)
+                f.write("\n")
+        with open(expected_path) as f:
+            expected = json.load(f)
+
+        fast = fast_parser(output)
+        if fast == expected and reference == expected:
+            result = "[green]match[/green]"
+        else:
+            ok = False
+            result = "[red]fast parser differs[/red]" if fast != expected else "[red]TextFSM differs[/red]"
+        table.add_row(os.path.basename(path), str(len(expected)), result)
+    console.print(table)
+    return ok
+
+def time_per_device(func, iterations: int) -> float:
+    """Return the mean wall-clock time of func in microseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+@click.command()
+@click.option('--iterations', '-n', default=2000, help='Devices to parse per measurement')
+@click.option('--neighbors', default=500, help='CDP entries in the synthetic core switch output')
+@click.option('--check', is_flag=True, help='Only verify the fast parsers against the golden corpus')
+@click.option('--update-golden', is_flag=True, help='Regenerate the golden rows from the TextFSM templates first')
+def main(iterations, neighbors, check, update_golden):
+    """Micro-benchmark per-device parse time: per-call compile, compiled registry and fast parsers."""
+    if not check_golden(update_golden):
+        console.print("[red]Fast parser output does not match the golden corpus[/red]")
+        sys.exit(1)
+    if check:
+        return
+
+    version_output = load_sample("show_version.txt")
+    cdp_output = load_sample("show_cdp_neighbors_detail.txt")
+    parser = Parser()
+    textfsm_parser = Parser()
+    textfsm_parser.fast_parsers = {}
+
+    before = time_per_device(lambda: parse_uncached(version_output, cdp_output), iterations)
+    cached = time_per_device(lambda: parse_cached(textfsm_parser, version_output, cdp_output), iterations)
+    fast = time_per_device(lambda: parse_cached(parser, version_output, cdp_output), iterations)
+
+    table = Table(title=f"Parse time per device ({iterations} iterations)")
+    table.add_column("Mode", style="cyan")
+    table.add_column("us/device", style="green", justify="right")
+    table.add_row("Open + compile per call", f"{before:.1f}")
+    table.add_row("Compiled registry", f"{cached:.1f}")
+    table.add_row("Fast parsers", f"{fast:.1f}")
+    table.add_row("Speedup (fast vs registry)", f"{cached / fast:.2f}x")
+    console.print(table)
+
+    # A core switch with hundreds of neighbors is where the CDP parse dominates
+    large_output = large_cdp_output(neighbors)
+    rounds = max(1, iterations // 100)
+    large_textfsm = time_per_device(lambda: textfsm_parser.parse_cdp_neighbors(large_output), rounds)
+    large_fast = time_per_device(lambda: parser.parse_cdp_neighbors(large_output), rounds)
+    if parser.parse_cdp_neighbors(large_output) != textfsm_parser.parse_cdp_neighbors(large_output):
+        console.print("[red]Fast parser output differs from TextFSM on the synthetic output[/red]")
+        sys.exit(1)
+
+    table = Table(title=f"show cdp neighbors detail with {neighbors} neighbors ({rounds} rounds)")
+    table.add_column("Mode", style="cyan")
+    table.add_column("ms/output", style="green", justify="right")
+    table.add_row("Compiled registry", f"{large_textfsm / 1000:.1f}")
+    table.add_row("Fast parser", f"{large_fast / 1000:.1f}")
+    table.add_row("Speedup", f"{large_textfsm / large_fast:.2f}x")
+    console.print(table)
+
+if __name__ == '__main__':
+    main()
@@ -1,64 +1,254 @@
-from netmiko import ConnectHandler
-from typing import Dict, Any, Optional
+from netmiko import ConnectHandler, SSHDetect, NetmikoAuthenticationException
+from typing import Dict, Any, Callable, List, Optional, Tuple
 import logging
-from parser import Parser
+import threading
+import time
+from parser import Parser, output_fingerprint
+from profiles import AUTODETECT
+from metrics import Metrics
+from sessions import JumpHost, SessionPool, SessionKey
+
+VERSION_COMMAND = "show version"
+CDP_COMMAND = "show cdp neighbors detail"
+
+# Outputs are keyed by these names whatever CLI a device type actually runs for them
+DEFAULT_COMMANDS = {VERSION_COMMAND: VERSION_COMMAND, CDP_COMMAND: CDP_COMMAND}
 
 class DeviceConnector:
     """Handles device connections and command execution."""
 
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], metrics: Optional[Metrics] = None):
         self.config = config
-        self.parser = Parser()
+        self.metrics = metrics or Metrics()
+        self.parser = Parser(config.get('templates'))
+        self.timeout = config.get('crawler', {}).get('timeout', 30)
         self.logger = logging.getLogger(__name__)
 
-    def connect(self, device_info: Dict[str, Any]) -> Optional[ConnectHandler]:
-        """Establish connection to a network device."""
+        # Command and template overrides per device type (profiles.device_types in config.yaml)
+        self.device_types = (config.get('profiles') or {}).get('device_types') or {}
+        # Used for a device SSHDetect cannot identify; detecting it again would cost the same logins
+        self.default_device_type = (config.get('profiles') or {}).get('default_device_type', 'cisco_ios')
+        self._parsers: Dict[str, Parser] = {}
+        self._parsers_lock = threading.Lock()
+
+        # Devices behind a bastion are reached over channels of one shared transport to it
+        jump_config = config.get('jump_host') or {}
+        self.jump_host = JumpHost(jump_config, self.timeout) if jump_config.get('host') else None
+        # Logged-in sessions kept between uses of the same device (sessions in config.yaml)
+        session_config = config.get('sessions') or {}
+        self.sessions = SessionPool(session_config.get('pool_size', 0), session_config.get('idle_timeout', 30),
+                                    self.disconnect)
+        self.metrics.track('pooled_sessions', lambda: len(self.sessions))
+
+    def _session_key(self, device_info: Dict[str, Any]) -> SessionKey:
+        return device_info['host'], device_info.get('port', 22)
+
+    def _channel(self, device_info: Dict[str, Any]) -> Optional[Any]:
+        """Open a channel to the device through the jump host, or return None to connect directly."""
+        if self.jump_host is None:
+            return None
+        return self.jump_host.open_channel(device_info['host'], device_info.get('port', 22))
+
+    def _open(self, device_info: Dict[str, Any]) -> ConnectHandler:
+        """Open a Netmiko session, detecting the device type first if needed; raises on failure."""
+        if device_info['device_type'] == AUTODETECT:
+            # The crawler reads the detected type back to cache it for the platform
+            device_info['device_type'] = self._detect(device_info)
+        sock = self._channel(device_info)
         try:
             connection = ConnectHandler(
                 device_type=device_info['device_type'],
                 host=device_info['host'],
                 username=device_info['username'],
                 password=device_info['password'],
-                port=device_info.get('port', 22)
+                port=device_info.get('port', 22),
+                sock=sock,
+                # Bound every phase so a dead device cannot hold a worker for Netmiko's defaults
+                conn_timeout=self.timeout,
+                auth_timeout=self.timeout,
+                banner_timeout=self.timeout,
+                read_timeout_override=self.timeout
             )
-            self.logger.info(f"Successfully connected to {device_info['host']}")
-            return connection
+        except Exception:
+            # A failed login must not leave its channel open on the shared jump host transport
+            if sock is not None:
+                sock.close()
+            raise
+        self.logger.info(f"Successfully connected to {device_info['host']}")
+        return connection
+
+    def connect(self, device_info: Dict[str, Any]) -> Optional[ConnectHandler]:
+        """Establish connection to a network device, detecting its type first if needed."""
+        try:
+            return self._open(device_info)
         except Exception as e:
             self.logger.error(f"Failed to connect to {device_info['host']}: {str(e)}")
             return None
 
+    def login(self, device_info: Dict[str, Any],
+              credentials: List[Dict[str, Any]]) -> Tuple[Optional[ConnectHandler], bool]:
+        """Connect with the first credential profile the device accepts.
+
+        Returns the connection and whether every profile was rejected. The
+        accepted profile's name and login are written back to device_info.
+        A live pooled session to the device is reused without logging in.
+        """
+        pooled = self._reuse(device_info)
+        if pooled is not None:
+            return pooled, False
+        return self._authenticate(device_info, credentials, self._open, 'connect')
+
+    def _reuse(self, device_info: Dict[str, Any]) -> Optional[ConnectHandler]:
+        """Take a live pooled session to the device, copying its login into device_info."""
+        pooled = self.sessions.acquire(self._session_key(device_info))
+        if pooled is None:
+            return None
+        connection, login = pooled
+        try:
+            alive = connection.is_alive()
+        except Exception:
+            alive = False
+        if not alive:
+            self.disconnect(connection)
+            return None
+        device_info.update(login)
+        self.metrics.inc('sessions_reused')
+        self.logger.info(f"Reusing session to {device_info['host']}")
+        return connection
+
+    def release(self, device_info: Dict[str, Any], connection: ConnectHandler) -> None:
+        """Pool a healthy session for a later visit to the device, or close it when pooling is off."""
+        login = {key: device_info[key] for key in ('device_type', 'username', 'password', 'credential')
+                 if key in device_info}
+        self.sessions.release(self._session_key(device_info), connection, login)
+
+    def close(self) -> None:
+        """Close pooled sessions and the jump host transport at the end of a crawl."""
+        self.sessions.close_all()
+        if self.jump_host is not None:
+            self.jump_host.close()
+
+    def _detect(self, device_info: Dict[str, Any]) -> str:
+        """Log in once with Netmiko's SSHDetect and return its best guess, or the default type; raises on failure."""
+        sock = self._channel(device_info)
+        try:
+            guesser = SSHDetect(
+                device_type=AUTODETECT,
+                host=device_info['host'],
+                username=device_info['username'],
+                password=device_info['password'],
+                port=device_info.get('port', 22),
+                sock=sock,
+                conn_timeout=self.timeout,
+                auth_timeout=self.timeout,
+                banner_timeout=self.timeout
+            )
+            device_type = guesser.autodetect()
+        finally:
+            if sock is not None:
+                sock.close()
+        if not device_type:
+            self.logger.warning(f"Could not detect the device type of {device_info['host']}; "
+                                f"using {self.default_device_type}")
+            return self.default_device_type
+        self.logger.info(f"Detected {device_info['host']} as {device_type}")
+        return device_type
+
+    def detect_device_type(self, device_info: Dict[str, Any],
+                           credentials: Optional[List[Dict[str, Any]]] = None) -> Optional[str]:
+        """Return Netmiko's device type guess, trying each credential profile if given."""
+        if credentials:
+            return self._authenticate(device_info, credentials, self._detect, 'detect')[0]
+        try:
+            with self.metrics.timer('detect'):
+                return self._detect(device_info)
+        except Exception as e:
+            self.logger.error(f"Failed to detect the device type of {device_info['host']}: {str(e)}")
+            return None
+
+    def _authenticate(self, device_info: Dict[str, Any], credentials: List[Dict[str, Any]],
+                      open_session: Callable[[Dict[str, Any]], Any], phase: str) -> Tuple[Any, bool]:
+        """Call open_session with each profile's login until one is not rejected, timing each attempt as phase."""
+        host = device_info['host']
+        for profile in credentials:
+            attempt = dict(device_info, username=profile['username'], password=profile['password'])
+            try:
+                with self.metrics.timer(phase):
+                    result = open_session(attempt)
+            except NetmikoAuthenticationException:
+                self.logger.info(f"Credential profile {profile['name']} rejected by {host}")
+                self.metrics.inc('login_rejections')
+                continue
+            except Exception as e:
+                self.logger.error(f"Failed to connect to {host}: {str(e)}")
+                return None, False
+            device_info.update(attempt, credential=profile['name'])
+            return result, False
+        self.logger.error(f"No credential profile was accepted by {host}")
+        return None, True
+
+    def commands(self, device_type: str) -> Dict[str, str]:
+        """Return the CLI to run for each output a device type provides."""
+        overrides = self.device_types.get(device_type, {}).get('commands', {})
+        return dict(DEFAULT_COMMANDS, **overrides)
+
+    def parser_for(self, device_type: str) -> Parser:
+        """Return the parser for a device type, using its template overrides if it has any."""
+        templates = self.device_types.get(device_type, {}).get('templates')
+        if not templates:
+            return self.parser
+        with self._parsers_lock:
+            if device_type not in self._parsers:
+                self._parsers[device_type] = Parser(dict(self.config.get('templates') or {}, **templates))
+            return self._parsers[device_type]
+
     def get_device_info(self, connection: ConnectHandler, device_info: Dict[str, Any]) -> Dict[str, Any]:
         """Gather device information using show commands."""
+        outputs = self.collect_outputs(connection, device_info['device_type'])
+        if not outputs:
+            return {}
+        return self.parse_device_info(device_info, outputs[VERSION_COMMAND], outputs[CDP_COMMAND])
+
+    def collect_outputs(self, connection: ConnectHandler, device_type: str = 'cisco_ios') -> Dict[str, str]:
+        """Run the device type's show commands and return their raw output."""
+        outputs = {}
         try:
-            # Get device version and basic info
-            version_output = connection.send_command("show version")
-            device_data = self.parser.parse_version(version_output)
-            
-            # Ensure all required fields are present
-            required_fields = {
-                'ip': device_info['host'],
-                'device_type': device_info['device_type'],
-                'hostname': device_data.get('hostname', ''),
-                'serial_number': device_data.get('serial_number', ''),
-                'platform': device_data.get('platform', ''),
-                'version': device_data.get('version', ''),
-                'neighbors': []
-            }
-            
-            # Get CDP neighbors
-            cdp_output = connection.send_command("show cdp neighbors detail")
-            required_fields['neighbors'] = self.parser.parse_cdp_neighbors(cdp_output)
-
-            # Log any missing required fields
-            for field, value in required_fields.items():
-                if not value:
-                    self.logger.warning(f"Missing value for field: {field}")
-
-            return required_fields
+            # Device version and basic info, then CDP neighbors
+            for name, command in self.commands(device_type).items():
+                started = time.perf_counter()
+                outputs[name] = connection.send_command(command)
+                self.metrics.observe('command', time.perf_counter() - started, command=name)
+            return outputs
         except Exception as e:
             self.logger.error(f"Error gathering device information: {str(e)}")
             return {}
 
+    def parse_device_info(self, device_info: Dict[str, Any], version_output: str,
+                          cdp_output: str) -> Dict[str, Any]:
+        """Build a device record from raw show version and CDP output."""
+        parser = self.parser_for(device_info['device_type'])
+        device_data = parser.parse_version(version_output)
+
+        # Ensure all required fields are present
+        required_fields = {
+            'ip': device_info['host'],
+            'device_type': device_info['device_type'],
+            'hostname': device_data.get('hostname', ''),
+            'serial_number': device_data.get('serial_number', ''),
+            'platform': device_data.get('platform', ''),
+            'version': device_data.get('version', ''),
+            'neighbors': parser.parse_cdp_neighbors(cdp_output),
+            'version_hash': output_fingerprint(version_output),
+            'cdp_hash': output_fingerprint(cdp_output)
+        }
+
+        # Log any missing required fields
+        for field, value in required_fields.items():
+            if not value:
+                self.logger.warning(f"Missing value for field: {field}")
+
+        return required_fields
+
     def disconnect(self, connection: ConnectHandler) -> None:
         """Close the connection to the device."""
         try:
@@ -5,25 +5,98 @@ import threading
 import signal
 import sys
 import os
+import json
+import time
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from devices import NetworkDevice
-from connect import DeviceConnector
-from data import DatabaseManager
+from connect import DeviceConnector, VERSION_COMMAND, CDP_COMMAND
+from parser import output_fingerprint
+from identity import IdentityIndex, identity_keys
+from profiles import ProfileResolver, AUTODETECT
+from credentials import CredentialManager
+from scope import ScopeFilter
+from frontier import Frontier
+from scheduler import RetryScheduler, DeadlineWatchdog
+from rawstore import RawOutputStore
+from metrics import TimedQueue
+from parse_pool import create_parse_pool, parse_outputs_timed, timed_parse, completed
+from data import (DatabaseManager, PENDING, IN_PROGRESS, DONE, FAILED, RUN_COMPLETED, RUN_STOPPED, RUN_FAILED,
+                  new_run_id)
 
 class CDPCrawler:
     """Main crawler class that manages the crawling process."""
 
-    def __init__(self, config_path: str):
-        self.config = self._load_config(config_path)
+    def __init__(self, config_path: str, config: Optional[Dict[str, Any]] = None,
+                 connector: Optional[DeviceConnector] = None):
+        self.config = self._load_config(config_path) if config is None else config
+        self.config_path = config_path
         self.setup_logging()
-        
-        self.device_queue = queue.Queue()
-        self.visited_devices = set()
-        self.db_manager = DatabaseManager(self.config['database']['path'])
-        self.connector = DeviceConnector(self.config)
+
+        # Phase timings and counters are shared by the connector, the workers and the database writer
+        self.connector = connector or DeviceConnector(self.config)
+        self.metrics = self.connector.metrics
+
+        self.device_queue = TimedQueue(lambda seconds: self.metrics.observe('queue_wait', seconds))
+        self.frontier = Frontier()  # Every address ever enqueued
+        self.identities = IdentityIndex()
+        db_config = self.config['database']
+        self.db_manager = DatabaseManager(
+            db_config['path'],
+            batch_size=db_config.get('batch_size', 200),
+            flush_interval=db_config.get('flush_interval', 1.0),
+            queue_size=db_config.get('queue_size', 5000),
+            metrics=self.metrics
+        )
+
+        # Neighbors get a device type from their CDP platform; autodetected types are cached per platform
+        self.profiles = ProfileResolver(self.config.get('profiles') or {}, self.db_manager.load_platform_profiles())
+
+        # Out-of-scope neighbors are dropped before they are queued, so they never take a worker
+        self.scope = ScopeFilter(self.config.get('scope') or {})
+        self.out_of_scope = 0
+        # CDP advertises addresses only, so neighbors whose SSH service is not on 22 are listed by address
+        self.ssh_ports = {str(address): int(port) for address, port in (self.config.get('ssh_ports') or {}).items()}
+
+        # Credential profiles are tried in order; the one that works is remembered per /24 and platform
+        self.credentials = CredentialManager.from_config(self.config, self.db_manager.load_credential_hints())
+
+        # Raw output is kept per run so templates can be re-applied offline (main.py reparse),
+        # and every device is snapshotted per run so runs can be compared (main.py diff)
+        self.run_id = new_run_id()
+        self.keep_runs = (self.config.get('history') or {}).get('keep_runs', 30)
+        raw_config = self.config.get('raw_store', {})
+        self.raw_store = RawOutputStore(raw_config.get('path', 'raw_outputs')) if raw_config.get('enabled', True) else None
         self.threads = []
         self.is_running = True
+
+        # I/O workers only collect output; parsing runs in a process pool and expansion on its own thread
+        crawler_config = self.config['crawler']
+        self.parse_processes = crawler_config.get('parse_processes')
+        self.parse_queue = queue.Queue(maxsize=crawler_config.get('parse_queue_size', 500))
+        self.parse_pool = None
+        self.expander = None
+
+        # Failed devices wait out their backoff off the worker threads; hung ones are cut off
+        self.scheduler = RetryScheduler(
+            self.device_queue,
+            retry_count=crawler_config.get('retry_count', 3),
+            retry_delay=crawler_config.get('retry_delay', 5),
+            max_delay=crawler_config.get('retry_max_delay', 300)
+        )
+        self.watchdog = DeadlineWatchdog(crawler_config.get('device_deadline', 300), self._abandon_device)
+        self.stragglers = 0
+        self.metrics.track('device_queue', self.device_queue.qsize)
+        self.metrics.track('parse_queue', self.parse_queue.qsize)
+        self.metrics.track('retries_waiting', self.scheduler.pending)
+        self.metrics.track('active_sessions', self.watchdog.in_flight)
+
+        # Incremental mode reuses stored records for devices whose output is unchanged
+        self.incremental = self.config['crawler'].get('incremental', False)
+        self.fingerprints: Dict[str, Dict[str, Any]] = {}
+        self.unchanged_devices = 0
+        self.stats_lock = threading.Lock()
         
         self.logger = logging.getLogger(__name__)
         
@@ -38,7 +111,7 @@ class CDPCrawler:
             os.makedirs(log_dir)
 
         # Generate timestamp for log filename
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
         log_file = os.path.join(log_dir, f'crawler_{timestamp}.log')
 
         # Configure logging
@@ -85,69 +158,399 @@ class CDPCrawler:
             return yaml.safe_load(f)
 
     def _worker(self) -> None:
-        """Worker thread for processing devices from the queue."""
+        """I/O worker: collect output from devices in the queue and hand it to the parse stage."""
         while self.is_running:
             try:
                 device_info = self.device_queue.get(timeout=5)
-                if device_info is None:
-                    break
-
-                ip = device_info['host']
-                if ip in self.visited_devices:
-                    self.device_queue.task_done()
-                    continue
+            except queue.Empty:
+                continue
+            if device_info is None:
+                break
 
-                self.visited_devices.add(ip)
-                self.logger.info(f"Processing device: {ip}")
+            # Addresses are de-duplicated when enqueued, so every dequeue is new work
+            ip = device_info['host']
+            started = time.perf_counter()
+            self.watchdog.begin(device_info)
+            try:
+                outputs, retryable, connection = self._collect_device(device_info)
+            except Exception as e:
+                self.logger.error(f"Error in worker thread: {str(e)}")
+                self.metrics.inc('failures', reason='error')
+                outputs, retryable, connection = None, False, None
 
-                connection = self.connector.connect(device_info)
-                if connection:
-                    device_data = self.connector.get_device_info(connection, device_info)
+            # Finished before the session is handed on, so the watchdog cannot expire it once pooled
+            finished = self.watchdog.finish(ip)
+            if connection is not None:
+                if finished:
+                    self.connector.release(device_info, connection)
+                else:
                     self.connector.disconnect(connection)
+            if not finished:
+                # Already abandoned: _abandon_device accounted for it and started a replacement
+                break
+            self.metrics.observe('device', time.perf_counter() - started)
 
-                    if device_data:
-                        self.db_manager.add_device(device_data)
-                        
-                        # Add neighbors to queue
-                        for neighbor in device_data.get('neighbors', []):
-                            if neighbor['ip'] not in self.visited_devices:
-                                neighbor_info = {
-                                    'host': neighbor['ip'],
-                                    'device_type': 'cisco_ios',  # Default, can be updated
-                                    'username': self.config['seed_device']['username'],
-                                    'password': self.config['seed_device']['password']
-                                }
-                                self.device_queue.put(neighbor_info)
-
-                self.device_queue.task_done()
-            except queue.Empty:
-                if not self.is_running:
-                    break
+            if outputs:
+                # The expander marks the device done once it is parsed; put blocks while the parse stage is full
+                self._store_outputs(device_info, outputs)
+                item = self._submit_parse(device_info, outputs)
+                with self.metrics.timer('parse_wait'):
+                    self.parse_queue.put(item)
                 continue
+
+            status = FAILED
+            if retryable and self.is_running and self._retry(device_info):
+                status = PENDING
+                self.metrics.inc('retries')
+            else:
+                self.metrics.inc('devices', status=FAILED)
+            self.db_manager.enqueue_frontier(ip, status)
+            self.device_queue.task_done()
+
+    def _collect_device(self, device_info: Dict[str, Any]) -> Tuple[Optional[Dict[str, str]], bool, Optional[Any]]:
+        """Collect one device's output; on failure, also return whether it is worth retrying.
+
+        On success the logged-in connection is returned as well, for the
+        worker to release once the device's deadline entry is finished.
+        """
+        ip = device_info['host']
+        self.db_manager.enqueue_frontier(ip, IN_PROGRESS)
+        self.logger.info(f"Processing device: {ip}")
+
+        autodetect = device_info['device_type'] == AUTODETECT
+        candidates = self.credentials.candidates(ip, device_info.get('platform', ''))
+        connection, rejected = self.connector.login(device_info, candidates)
+        if not connection:
+            self.metrics.inc('failures', reason='auth' if rejected else 'connect')
+            # Retrying cannot help once every credential profile has been refused
+            return None, not rejected, None
+        outputs = None
+        try:
+            self._learn_credential(device_info)
+            if autodetect:
+                self._learn_device_type(device_info)
+            self.watchdog.attach(ip, connection)
+            outputs = self.connector.collect_outputs(connection, device_info['device_type'])
+        finally:
+            if not outputs:
+                # Closes the session, and any jump host channel under it, when collection failed or raised
+                self.connector.disconnect(connection)
+        if not outputs:
+            self.metrics.inc('failures', reason='command')
+            return None, True, None
+        return outputs, False, connection
+
+    def _learn_credential(self, device_info: Dict[str, Any]) -> None:
+        """Remember the credential profile the device accepted for its subnet and platform."""
+        if not device_info.get('credential'):
+            return
+        hints = self.credentials.learn(device_info['host'], device_info.get('platform', ''),
+                                       device_info['credential'])
+        for key, profile in hints.items():
+            self.db_manager.enqueue_credential_hint(key, profile)
+
+    def _learn_device_type(self, device_info: Dict[str, Any]) -> None:
+        """Cache the device type the connector detected for the device's platform."""
+        if self.profiles.learn(device_info.get('platform', ''), device_info['device_type']):
+            self.db_manager.enqueue_platform_profile(device_info['platform'], device_info['device_type'])
+
+    def _submit_parse(self, device_info: Dict[str, Any],
+                      outputs: Dict[str, str]) -> Tuple[Dict[str, Any], Future, bool]:
+        """Start parsing collected output; return (device_info, future (record, parse seconds), changed)."""
+        cached = self._unchanged_device_data(device_info, outputs)
+        if cached:
+            return device_info, completed((cached, None)), False
+        if self.parse_pool is None:
+            return device_info, completed(timed_parse(self.connector, device_info, outputs)), True
+        return device_info, self.parse_pool.submit(parse_outputs_timed, device_info, outputs), True
+
+    def _expand_worker(self) -> None:
+        """Store parsed devices and queue their neighbors, in the order they were collected."""
+        while True:
+            item = self.parse_queue.get()
+            if item is None:
+                break
+            device_info, future, changed = item
+            ip = device_info['host']
+            status = FAILED
+            try:
+                device_data, parse_seconds = future.result()
+                if parse_seconds is not None:
+                    self.metrics.observe('parse', parse_seconds)
+                if device_data:
+                    self._expand_device(device_info, device_data, changed)
+                    status = DONE
             except Exception as e:
-                self.logger.error(f"Error in worker thread: {str(e)}")
-                self.device_queue.task_done()
+                self.logger.error(f"Error processing device {ip}: {str(e)}")
+            if status == FAILED:
+                self.metrics.inc('failures', reason='parse')
+            self.metrics.inc('devices', status=status)
+            self.db_manager.enqueue_frontier(ip, status)
+            self.device_queue.task_done()
+
+    def _expand_device(self, device_info: Dict[str, Any], device_data: Dict[str, Any], changed: bool) -> None:
+        """Write a parsed device and add its undiscovered neighbors to the queue."""
+        if self._register_identity(device_info, device_data):
+            return
+        if changed:
+            self.db_manager.enqueue_device(device_data)
+        self.db_manager.enqueue_run_device(self.run_id, device_data)
 
-    def start(self) -> None:
-        """Start the crawling process."""
+        # Add neighbors to queue
+        self._enqueue_targets(self._discover_neighbors(device_data, device_info.get('depth', 0) + 1))
+
+    def _enqueue_targets(self, targets: List[Dict[str, Any]]) -> None:
+        """Record newly discovered devices in the frontier and queue them for the I/O workers."""
+        for neighbor_info in targets:
+            self.db_manager.enqueue_frontier(neighbor_info['host'], PENDING, neighbor_info)
+            self.device_queue.put(neighbor_info)
+
+    def _retry(self, device_info: Dict[str, Any]) -> bool:
+        """Schedule another attempt at a failed device; return False once its retries are spent."""
+        return self.scheduler.retry(device_info)
+
+    def _abandon_device(self, device_info: Dict[str, Any], connection: Any, thread: threading.Thread) -> None:
+        """Give up on a device past its deadline and replace the worker stuck on it."""
+        # The stuck thread exits on its own once unblocked; shutdown does not wait for it
+        if thread in self.threads:
+            self.threads.remove(thread)
+        if connection is not None:
+            self.connector.disconnect(connection)
+        self.db_manager.enqueue_frontier(device_info['host'], FAILED)
+        self.metrics.inc('failures', reason='deadline')
+        self.metrics.inc('devices', status=FAILED)
+        with self.stats_lock:
+            self.stragglers += 1
+        self.device_queue.task_done()
+        if self.is_running:
+            self._start_worker()
+
+    def _start_parse_stage(self) -> None:
+        """Start the parse process pool and the thread that expands its results."""
+        self.parse_pool = create_parse_pool(self.config, self.parse_processes)
+        self.expander = threading.Thread(target=self._expand_worker, name="expander", daemon=True)
+        self.expander.start()
+
+    def _stop_parse_stage(self) -> None:
+        """Drain results already collected, then shut the parse stage down."""
+        if self.expander:
+            self.parse_queue.put(None)
+            self.expander.join()
+            self.expander = None
+        if self.parse_pool:
+            self.parse_pool.shutdown(wait=True)
+            self.parse_pool = None
+
+    def _start_worker(self) -> None:
+        """Add a worker thread to the pool."""
+        # Daemon threads, so a worker still stuck on an abandoned device cannot block exit
+        thread = threading.Thread(target=self._worker, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def _store_outputs(self, device_info: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        """Save raw command output for this run in the raw output store."""
+        if self.raw_store is None:
+            return
+        for command, output in outputs.items():
+            try:
+                digest = self.raw_store.put(output)
+            except OSError as e:
+                self.logger.error(f"Error storing {command} output for {device_info['host']}: {str(e)}")
+                continue
+            self.db_manager.enqueue_raw_output(self.run_id, device_info['host'],
+                                               device_info['device_type'], command, digest)
+
+    def _unchanged_device_data(self, device_info: Dict[str, Any], outputs: Dict[str, str]) -> Dict[str, Any]:
+        """Return the stored record if the device's output is unchanged, else an empty dict."""
+        version_output = outputs[VERSION_COMMAND]
+        cdp_output = outputs[CDP_COMMAND]
+
+        cached = self.fingerprints.get(device_info['host'])
+        if cached:
+            if (cached['version_hash'] == output_fingerprint(version_output)
+                    and cached['cdp_hash'] == output_fingerprint(cdp_output)):
+                # Same CDP output as last time, so the stored neighbor list is still accurate
+                with self.stats_lock:
+                    self.unchanged_devices += 1
+                self.metrics.inc('unchanged')
+                self.logger.info(f"Device {device_info['host']} unchanged, skipping parse and write")
+                return {
+                    'ip': device_info['host'],
+                    'device_type': device_info['device_type'],
+                    'hostname': cached['hostname'],
+                    'serial_number': cached['serial_number'],
+                    'platform': cached['platform'],
+                    'version': cached['version'],
+                    'neighbors': json.loads(cached['neighbors']) if cached['neighbors'] else []
+                }
+        return {}
+
+    def _register_identity(self, device_info: Dict[str, Any], device_data: Dict[str, Any]) -> Optional[str]:
+        """Index a crawled device by the serial (or, lacking one, the hostname) it reported.
+
+        Returns the primary IP of the device already crawled under the same
+        serial if this is another address of it, after recording the address.
+        """
+        ip = device_info['host']
+        keys = identity_keys(
+            device_info.get('device_id', ''),
+            device_data.get('hostname', ''),
+            device_data.get('serial_number', '')
+        )
+        primary = self.identities.register(ip, keys)
+        if primary is not None:
+            self.logger.info(f"Device {ip} is another address of {primary}, not stored again")
+            self.db_manager.enqueue_address(ip, primary)
+        return primary
+
+    def _discover_neighbors(self, device_data: Dict[str, Any], depth: int = 1) -> List[Dict[str, Any]]:
+        """Return connection details for in-scope neighbors, depth hops from the seed, that still need crawling."""
+        targets = []
+        # Past the depth limit nothing is marked, as a shorter path may reach the same devices later
+        if not self.scope.within_depth(depth):
+            return targets
+        for neighbor in device_data.get('neighbors', []):
+            ip = neighbor['ip']
+            if not ip or not self.frontier.add(ip):
+                continue
+
+            reason = self.scope.reason(neighbor)
+            if reason:
+                self.logger.debug(f"Neighbor {ip} ({neighbor.get('device_id', '')}) is out of scope: {reason}")
+                with self.stats_lock:
+                    self.out_of_scope += 1
+                continue
+
+            # A device advertising another management address is still the same device
+            primary = self.identities.claim(ip, identity_keys(neighbor.get('device_id', '')))
+            if primary is not None:
+                if primary != ip:
+                    self.logger.debug(f"Neighbor {ip} is another address of {primary}, skipping")
+                    self.db_manager.enqueue_address(ip, primary)
+                continue
+
+            targets.append({
+                'host': ip,
+                'device_id': neighbor.get('device_id', ''),
+                'device_type': self.profiles.device_type(neighbor.get('platform', '')),
+                'platform': neighbor.get('platform', ''),
+                'port': self.ssh_ports.get(ip, 22),
+                'depth': depth
+            })
+        return targets
+
+    def _load_identities(self) -> None:
+        """Rebuild the identity index from devices and addresses already stored."""
+        devices, addresses = self.db_manager.load_identities()
+        for ip, hostname, serial_number in devices:
+            self.identities.register(ip, identity_keys(hostname=hostname, serial_number=serial_number))
+        for address, device_ip in addresses:
+            self.identities.add_address(device_ip, address)
+
+    def _wait_for_queue(self) -> None:
+        """Block until the queue is drained, no retries are waiting, or the crawl is stopped."""
+        while self.is_running:
+            # Check retries first: the scheduler puts a device on the queue before it stops counting it.
+            # Neither check runs under the queue mutex, which the scheduler needs to put a device.
+            if not self.scheduler.pending() and not self.device_queue.unfinished_tasks:
+                return
+            with self.device_queue.all_tasks_done:
+                self.device_queue.all_tasks_done.wait(timeout=1 if self.device_queue.unfinished_tasks else 0.1)
+
+    def _initial_targets(self, resume: bool) -> List[Dict[str, Any]]:
+        """Return the devices to start from: the seed, or the unfinished frontier on resume."""
+        if resume:
+            remaining, done = self.db_manager.load_frontier()
+            if remaining or done:
+                self.frontier.update(done)
+                self._load_identities()
+                self.logger.info(f"Resuming crawl: {len(done)} devices done, {len(remaining)} remaining")
+                targets = []
+                for device_info in remaining:
+                    if not self.frontier.add(device_info['host']):
+                        continue
+                    primary = self.identities.claim(device_info['host'], identity_keys(device_info.get('device_id', '')))
+                    if primary not in (None, device_info['host']):
+                        continue
+                    # Logins come from the credential profiles, never from the frontier table
+                    targets.append(device_info)
+                return targets
+            self.logger.info("No saved frontier found, starting from the seed device")
+        else:
+            self.db_manager.reset_frontier()
+
+        seed = self.config['seed_device']
+        self.frontier.add(seed['host'])
+        self.identities.claim(seed['host'], [])
+        self.db_manager.enqueue_frontier(seed['host'], PENDING, seed)
+        return [seed]
+
+    def _begin_run(self, resume: bool = False) -> None:
+        """Record this crawl in the run history; a resumed crawl continues the run it interrupted."""
+        if resume:
+            latest = self.db_manager.latest_run()
+            if latest and latest['status'] != RUN_COMPLETED:
+                self.run_id = latest['run_id']
+        self.db_manager.start_run(self.run_id)
+        self.logger.info(f"Crawl run {self.run_id}")
+
+    def _end_run(self, completed: bool, failed: bool = False) -> None:
+        """Record how the crawl run ended and drop the oldest runs' snapshots."""
+        status = RUN_COMPLETED if completed else RUN_FAILED if failed else RUN_STOPPED
+        devices = self.db_manager.finish_run(self.run_id, status)
+        self.logger.info(f"Crawl run {self.run_id} {status}; recorded {devices} devices")
+        if completed:
+            self.db_manager.prune_runs(self.keep_runs)
+
+    def start(self, resume: bool = False) -> None:
+        """Start the crawling process, optionally resuming the last interrupted crawl."""
+        completed = False
         try:
-            # Add seed device to queue
-            self.device_queue.put(self.config['seed_device'])
+            if self.incremental:
+                self.fingerprints = self.db_manager.load_fingerprints()
+                self.logger.info(f"Incremental crawl: {len(self.fingerprints)} stored device fingerprints")
+            self._begin_run(resume)
+
+            # Persistence runs on its own thread so workers never touch the session
+            self.db_manager.start_writer()
+
+            # Add seed device (or the saved frontier) to queue
+            for device_info in self._initial_targets(resume):
+                self.device_queue.put(device_info)
+
+            self._start_parse_stage()
+            self.scheduler.start()
+            self.watchdog.start()
 
             # Create worker threads
             for _ in range(self.config['crawler']['max_threads']):
-                thread = threading.Thread(target=self._worker)
-                thread.start()
-                self.threads.append(thread)
+                self._start_worker()
 
-            # Wait for all devices to be processed
-            self.device_queue.join()
+            # Wait for all devices to be processed, or for Ctrl+C
+            self._wait_for_queue()
 
-            self.logger.info("Crawling completed")
+            if self.is_running:
+                completed = True
+                self.logger.info("Crawling completed")
+                if self.incremental:
+                    self.logger.info(f"{self.unchanged_devices} unchanged devices were not rewritten")
+                if self.out_of_scope:
+                    self.logger.info(f"{self.out_of_scope} out-of-scope neighbors were not crawled")
+                if self.stragglers:
+                    self.logger.warning(f"{self.stragglers} devices were abandoned after the per-device deadline")
+            else:
+                self.logger.info("Crawling stopped; run with --resume to continue")
         except KeyboardInterrupt:
             self.logger.info("Crawling interrupted by user")
         finally:
+            self.watchdog.stop()
+            self.scheduler.stop()
             self._stop_workers()
+            self.connector.close()
+            self._stop_parse_stage()
+            self.db_manager.stop_writer()
+            self._end_run(completed)
 
     def export_to_csv(self, filename: str = None) -> None:
         """Export the collected data to CSV."""
@@ -0,0 +1,69 @@
+import ipaddress
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+def subnet_key(ip: str) -> Optional[str]:
+    """Return the hint key for the /24 (or IPv6 /64) an address belongs to."""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return None
+    prefix = 24 if address.version == 4 else 64
+    return f"subnet:{ipaddress.ip_network(f'{address}/{prefix}', strict=False)}"
+
+def platform_key(platform: str) -> Optional[str]:
+    """Return the hint key for a CDP platform string."""
+    platform = (platform or '').strip()
+    return f"platform:{platform}" if platform else None
+
+class CredentialManager:
+    """Orders credential profiles per device by what worked on its subnet and platform before.
+
+    Profiles are tried in config order until one authenticates. The
+    winner is remembered for the device's /24 and platform, so
+    neighbouring devices normally log in on the first attempt.
+    """
+
+    def __init__(self, profiles: List[Dict[str, Any]], learned: Optional[Dict[str, str]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.profiles = profiles
+        self.learned: Dict[str, str] = dict(learned or {})
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], learned: Optional[Dict[str, str]] = None) -> 'CredentialManager':
+        """Build the profile list from config.yaml, falling back to the seed device's login."""
+        profiles = []
+        for index, profile in enumerate(config.get('credentials') or []):
+            profiles.append({
+                'name': profile.get('name', f"profile{index + 1}"),
+                'username': profile['username'],
+                'password': profile['password']
+            })
+        seed = config['seed_device']
+        if seed.get('username') and not any(
+                (profile['username'], profile['password']) == (seed['username'], seed.get('password'))
+                for profile in profiles):
+            profiles.append({'name': 'seed', 'username': seed['username'], 'password': seed.get('password')})
+        return cls(profiles, learned)
+
+    def candidates(self, ip: str, platform: str = '') -> List[Dict[str, Any]]:
+        """Return the profiles to try for a device, likeliest first."""
+        with self._lock:
+            preferred = [self.learned.get(key) for key in (subnet_key(ip), platform_key(platform)) if key]
+        ranked = [name for name in preferred if name]
+        return sorted(self.profiles, key=lambda profile: ranked.index(profile['name'])
+                      if profile['name'] in ranked else len(ranked))
+
+    def learn(self, ip: str, platform: str, name: str) -> Dict[str, str]:
+        """Record the profile that worked for a device; return the hints that changed."""
+        changed = {}
+        with self._lock:
+            for key in (subnet_key(ip), platform_key(platform)):
+                if key and self.learned.get(key) != name:
+                    self.learned[key] = name
+                    changed[key] = name
+        for key in changed:
+            self.logger.debug(f"Credential profile {name} learned for {key}")
+        return changed
@@ -1,10 +1,18 @@
-from sqlalchemy import create_engine, Column, String, Integer, JSON
+from sqlalchemy import (create_engine, event, func, inspect, text, and_, or_, select, update, delete, exists,
+                        Column, String, Integer, Float, JSON, UniqueConstraint)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-import pandas as pd
-from typing import Dict, Any, List
+from sqlalchemy.orm import sessionmaker, aliased
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+import hashlib
 import logging
 import json
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from metrics import Metrics
 
 Base = declarative_base()
 
@@ -13,39 +21,352 @@ class Device(Base):
     __tablename__ = 'devices'
 
     id = Column(Integer, primary_key=True)
-    hostname = Column(String)
+    hostname = Column(String, index=True)
     ip = Column(String, unique=True)
+    device_type = Column(String, index=True)
+    serial_number = Column(String, index=True)
+    platform = Column(String, index=True)
+    version = Column(String, index=True)
+    neighbors = Column(String)  # Changed from JSON to String to store serialized JSON
+    version_hash = Column(String)  # Fingerprint of show version, minus volatile lines
+    cdp_hash = Column(String)  # Fingerprint of show cdp neighbors detail, minus volatile lines
+
+# Frontier statuses; pending and in-progress entries are crawled again on resume
+PENDING = 'pending'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+FAILED = 'failed'
+
+class FrontierEntry(Base):
+    """SQLAlchemy model for the persistent crawl frontier."""
+    __tablename__ = 'frontier'
+
+    ip = Column(String, primary_key=True)
+    status = Column(String, index=True)
+    device_info = Column(String)  # Serialized connection details, without the password
+    updated_at = Column(Float)
+    lease_owner = Column(String)  # Distributed worker holding the entry
+    lease_expires = Column(Float)  # In progress: lease end; pending: earliest retry time
+
+class DeviceAddress(Base):
+    """SQLAlchemy model mapping every known address to its device's primary IP."""
+    __tablename__ = 'device_addresses'
+
+    address = Column(String, primary_key=True)
+    device_ip = Column(String, index=True)
+
+class Link(Base):
+    """SQLAlchemy model for one CDP adjacency, as seen from the local device."""
+    __tablename__ = 'links'
+
+    id = Column(Integer, primary_key=True)
+    local_ip = Column(String, index=True)
+    local_interface = Column(String)
+    remote_ip = Column(String, index=True)
+    remote_device_id = Column(String, index=True)
+    remote_interface = Column(String)
+    remote_platform = Column(String)
+
+class RawOutput(Base):
+    """SQLAlchemy model pointing at the raw output a device returned in one crawl run."""
+    __tablename__ = 'raw_outputs'
+    __table_args__ = (UniqueConstraint('run_id', 'ip', 'command'),)
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(String, index=True)
+    ip = Column(String, index=True)
+    device_type = Column(String)
+    command = Column(String)
+    digest = Column(String)  # Key of the compressed output in the RawOutputStore
+    collected_at = Column(Float)
+
+class PlatformProfile(Base):
+    """SQLAlchemy model caching the device type autodetected for a CDP platform string."""
+    __tablename__ = 'platform_profiles'
+
+    platform = Column(String, primary_key=True)
+    device_type = Column(String)
+    detected_at = Column(Float)
+
+class CredentialHint(Base):
+    """SQLAlchemy model recording which credential profile worked for a subnet or platform."""
+    __tablename__ = 'credential_hints'
+
+    key = Column(String, primary_key=True)  # subnet:<network> or platform:<CDP platform>
+    profile = Column(String)  # Profile name only; passwords stay in config.yaml
+    updated_at = Column(Float)
+
+# Crawl run statuses; a stopped or failed run is continued by crawl --resume
+RUN_RUNNING = 'running'
+RUN_COMPLETED = 'completed'
+RUN_STOPPED = 'stopped'
+RUN_FAILED = 'failed'
+
+def new_run_id() -> str:
+    """Return the ID for a crawl run starting now; to the microsecond, so runs started together stay apart."""
+    return datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+
+class CrawlRun(Base):
+    """SQLAlchemy model for one crawl run, whose devices are snapshotted in run_devices."""
+    __tablename__ = 'crawl_runs'
+
+    run_id = Column(String, primary_key=True)
+    started_at = Column(Float)
+    finished_at = Column(Float)
+    status = Column(String)
+    devices = Column(Integer)
+
+class RunDevice(Base):
+    """SQLAlchemy model for a device as one crawl run saw it."""
+    __tablename__ = 'run_devices'
+
+    run_id = Column(String, primary_key=True)
+    ip = Column(String, primary_key=True)
+    hostname = Column(String)
     device_type = Column(String)
-    serial_number = Column(String)
     platform = Column(String)
     version = Column(String)
-    neighbors = Column(String)  # Changed from JSON to String to store serialized JSON
+    serial_number = Column(String)
+    links_hash = Column(String, index=True)  # Key of the device's CDP adjacencies in link_sets
+
+class LinkSet(Base):
+    """SQLAlchemy model for the CDP adjacencies of a device, stored once per distinct set."""
+    __tablename__ = 'link_sets'
+
+    id = Column(Integer, primary_key=True)
+    links_hash = Column(String, index=True)
+    local_interface = Column(String)
+    remote_device_id = Column(String)
+    remote_interface = Column(String)
+    remote_ip = Column(String)
+    remote_platform = Column(String)
+
+# Conflict target used when upserting each table
+UPSERT_KEYS = {
+    Device: ['ip'],
+    FrontierEntry: ['ip'],
+    DeviceAddress: ['address'],
+    RawOutput: ['run_id', 'ip', 'command'],
+    PlatformProfile: ['platform'],
+    CredentialHint: ['key'],
+    CrawlRun: ['run_id'],
+    RunDevice: ['run_id', 'ip'],
+}
+
+# Applied to every new SQLite connection; WAL lets readers run while the writer commits
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA busy_timeout=30000",
+)
+
+# Queue marker telling the writer thread to flush and exit
+_STOP = object()
+
+# Write queue key for frontier entries inserted only if the address is not already known
+_NEW_FRONTIER = object()
+
+# Write queue key for a device's link set, inserted only if its hash is not already stored
+_LINK_SET = object()
+
+def _device_row(device_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a devices table row, with default values for missing fields."""
+    return {
+        'hostname': device_data.get('hostname', ''),
+        'ip': device_data.get('ip', ''),
+        'device_type': device_data.get('device_type', ''),
+        'serial_number': device_data.get('serial_number', ''),
+        'platform': device_data.get('platform', ''),
+        'version': device_data.get('version', ''),
+        'neighbors': json.dumps(device_data.get('neighbors', [])),  # Serialize neighbors to JSON string
+        'version_hash': device_data.get('version_hash'),
+        'cdp_hash': device_data.get('cdp_hash')
+    }
+
+def _link_rows(device_row: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Build links table rows from a device row's serialized neighbors."""
+    neighbors = json.loads(device_row['neighbors']) if device_row.get('neighbors') else []
+    return [
+        {
+            'local_ip': device_row['ip'],
+            'local_interface': neighbor.get('local_interface', ''),
+            'remote_ip': neighbor.get('ip', ''),
+            'remote_device_id': neighbor.get('device_id', ''),
+            'remote_interface': neighbor.get('neighbor_interface', ''),
+            'remote_platform': neighbor.get('platform', '')
+        }
+        for neighbor in neighbors
+    ]
+
+def _link_set(neighbors: List[Dict[str, Any]]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """Return the hash identifying a neighbor list's adjacencies, and its link_sets rows."""
+    links = {}
+    for neighbor in neighbors:
+        key = (neighbor.get('local_interface') or '', neighbor.get('device_id') or '',
+               neighbor.get('neighbor_interface') or '')
+        links.setdefault(key, neighbor)
+    if not links:
+        return None, []
+    links_hash = hashlib.sha1(json.dumps(sorted(links)).encode()).hexdigest()
+    return links_hash, [
+        {
+            'links_hash': links_hash,
+            'local_interface': local_interface,
+            'remote_device_id': remote_device_id,
+            'remote_interface': remote_interface,
+            'remote_ip': neighbor.get('ip') or '',
+            'remote_platform': neighbor.get('platform') or ''
+        }
+        for (local_interface, remote_device_id, remote_interface), neighbor in links.items()
+    ]
+
+# SQLite limits bound parameters per statement; IN lists are split into chunks of this size
+IN_CHUNK = 500
+
+# Device columns that status summaries and listings can filter on
+DEVICE_FILTER_COLUMNS = ('hostname', 'ip', 'device_type', 'platform', 'version', 'serial_number')
+
+def _device_conditions(filters: Optional[List[Tuple[str, str]]]) -> List[Any]:
+    """Build WHERE conditions from (column, value) filters.
+
+    Values containing *, ? or [ are GLOB patterns, which use the column's
+    index when they start with a literal prefix. Several values for one
+    column match any of them; different columns must all match.
+    """
+    values: Dict[str, List[str]] = {}
+    for name, value in filters or []:
+        if name not in DEVICE_FILTER_COLUMNS:
+            raise ValueError(f"Cannot filter devices by '{name}'")
+        values.setdefault(name, []).append(value)
+    conditions = []
+    for name, patterns in values.items():
+        column = getattr(Device, name)
+        conditions.append(or_(*(column.op('GLOB')(value) if any(c in value for c in '*?[') else column == value
+                                for value in patterns)))
+    return conditions
 
 class DatabaseManager:
     """Manages database operations for the crawler."""
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, batch_size: int = 200, flush_interval: float = 1.0,
+                 queue_size: int = 5000, metrics: Optional[Metrics] = None):
         self.engine = create_engine(f'sqlite:///{db_path}')
+        event.listen(self.engine, 'connect', self._set_pragmas)
         Base.metadata.create_all(self.engine)
-        Session = sessionmaker(bind=self.engine)
-        self.session = Session()
+        self._add_missing_columns()
+        self.Session = sessionmaker(bind=self.engine)
+        self.session = self.Session()
         self.logger = logging.getLogger(__name__)
 
+        # Single-writer pipeline: workers enqueue, one thread owns the write session
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_queue = queue.Queue(maxsize=queue_size)
+        self.writer_thread: Optional[threading.Thread] = None
+
+        # Writer statistics, read by the benchmark
+        self.rows_written = 0
+        self.write_seconds = 0.0
+        self.metrics = metrics
+        if metrics:
+            metrics.track('write_queue', self.write_queue.qsize)
+
+    @staticmethod
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        """Tune each SQLite connection for concurrent reads and batched writes."""
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+    def _add_missing_columns(self) -> None:
+        """Add columns and indexes introduced since an existing database file was created."""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                existing = {column['name'] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existing:
+                        column_type = column.type.compile(dialect=self.engine.dialect)
+                        connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                for index in table.indexes:
+                    index.create(connection, checkfirst=True)
+
+    def _replace_links(self, session, device_rows: List[Dict[str, Any]]) -> None:
+        """Replace the stored links of each device with those in its neighbor list."""
+        ips = [row['ip'] for row in device_rows]
+        for start in range(0, len(ips), IN_CHUNK):
+            session.query(Link).filter(Link.local_ip.in_(ips[start:start + IN_CHUNK])).delete(synchronize_session=False)
+        links = [link for row in device_rows for link in _link_rows(row)]
+        if links:
+            session.execute(sqlite_insert(Link), links)
+
+    def rebuild_links(self) -> int:
+        """Regenerate the links table from the neighbor lists stored on devices."""
+        self.session.query(Link).delete()
+        count = 0
+        last_id = 0
+        while True:
+            # Keyset pagination, so reads never overlap the inserts on this connection
+            rows = (self.session.query(Device.id, Device.ip, Device.neighbors)
+                    .filter(Device.id > last_id).order_by(Device.id).limit(1000).all())
+            if not rows:
+                break
+            batch = [{'ip': row.ip, 'neighbors': row.neighbors} for row in rows]
+            self._replace_links(self.session, batch)
+            count += sum(len(_link_rows(row)) for row in batch)
+            last_id = rows[-1].id
+        self.session.commit()
+        return count
+
+    def _upsert(self, session, model, rows: List[Dict[str, Any]]) -> None:
+        """Insert or update rows in the current transaction; None leaves a column unchanged."""
+        keys = UPSERT_KEYS[model]
+        stmt = sqlite_insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={name: func.coalesce(stmt.excluded[name], getattr(model, name))
+                  for name in rows[0] if name not in keys}
+        )
+        session.execute(stmt, rows)
+
+    def _insert_new(self, session, model, rows: List[Dict[str, Any]]) -> None:
+        """Insert rows in the current transaction, skipping any whose key already exists."""
+        stmt = sqlite_insert(model).on_conflict_do_nothing(index_elements=UPSERT_KEYS[model])
+        session.execute(stmt, rows)
+
+    def _insert_link_sets(self, session, rows: List[Dict[str, Any]]) -> None:
+        """Store the links of each link set whose hash is not already stored."""
+        link_sets = {row['links_hash']: row['links'] for row in rows}
+        hashes = list(link_sets)
+        for start in range(0, len(hashes), IN_CHUNK):
+            stored = session.execute(
+                select(LinkSet.links_hash).where(LinkSet.links_hash.in_(hashes[start:start + IN_CHUNK])).distinct()
+            ).scalars()
+            for links_hash in stored:
+                del link_sets[links_hash]
+        links = [link for rows in link_sets.values() for link in rows]
+        if links:
+            # A Core insert skips the ORM's per-row bookkeeping, which dominates at ~10 links a device
+            session.execute(LinkSet.__table__.insert(), links)
+
+    def _write(self, session, model, rows: List[Dict[str, Any]]) -> None:
+        """Write queued rows of one kind in the current transaction."""
+        if model is _NEW_FRONTIER:
+            self._insert_new(session, FrontierEntry, rows)
+        elif model is _LINK_SET:
+            self._insert_link_sets(session, rows)
+        else:
+            self._upsert(session, model, rows)
+
     def add_device(self, device_data: Dict[str, Any]) -> bool:
         """Add a device to the database."""
         try:
-            # Ensure all required fields are present with default values
-            device = Device(
-                hostname=device_data.get('hostname', ''),
-                ip=device_data.get('ip', ''),
-                device_type=device_data.get('device_type', ''),
-                serial_number=device_data.get('serial_number', ''),
-                platform=device_data.get('platform', ''),
-                version=device_data.get('version', ''),
-                neighbors=json.dumps(device_data.get('neighbors', []))  # Serialize neighbors to JSON string
-            )
-            
-            self.session.add(device)
+            row = _device_row(device_data)
+            self._upsert(self.session, Device, [row])
+            self._replace_links(self.session, [row])
             self.session.commit()
             self.logger.info(f"Successfully added device {device_data.get('ip')} to database")
             return True
@@ -55,10 +376,338 @@ class DatabaseManager:
             self.session.rollback()
             return False
 
+    def start_writer(self) -> None:
+        """Start the background thread that persists queued devices."""
+        if self.writer_thread and self.writer_thread.is_alive():
+            return
+        self.writer_thread = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+        self.writer_thread.start()
+
+    def enqueue_device(self, device_data: Dict[str, Any]) -> None:
+        """Queue a device for the writer thread, blocking while the queue is full."""
+        if self.writer_thread is None:
+            self.add_device(device_data)
+            return
+        self.write_queue.put((Device, _device_row(device_data)))
+
+    def enqueue_frontier(self, ip: str, status: str, device_info: Optional[Dict[str, Any]] = None,
+                         not_before: Optional[float] = None) -> None:
+        """Queue a frontier status change for the writer thread."""
+        row = {
+            'ip': ip,
+            'status': status,
+            'device_info': None,
+            'updated_at': time.time(),
+            'lease_expires': not_before
+        }
+        if device_info is not None:
+            row['device_info'] = json.dumps({k: v for k, v in device_info.items() if k != 'password'})
+        if self.writer_thread is None:
+            self._upsert(self.session, FrontierEntry, [row])
+            self.session.commit()
+            return
+        self.write_queue.put((FrontierEntry, row))
+
+    def enqueue_new_frontier(self, ip: str, device_info: Dict[str, Any]) -> None:
+        """Queue a pending frontier entry that is dropped if the address is already in the frontier."""
+        row = {
+            'ip': ip,
+            'status': PENDING,
+            'device_info': json.dumps({k: v for k, v in device_info.items() if k != 'password'}),
+            'updated_at': time.time()
+        }
+        if self.writer_thread is None:
+            self._insert_new(self.session, FrontierEntry, [row])
+            self.session.commit()
+            return
+        self.write_queue.put((_NEW_FRONTIER, row))
+
+    def lease_frontier(self, owner: str, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """Atomically claim up to limit pending or expired entries for a distributed worker."""
+        now = time.time()
+        # A unique token lets this call read back exactly the rows its UPDATE claimed
+        token = f"{owner}:{uuid.uuid4().hex}"
+        expired = or_(FrontierEntry.lease_expires.is_(None), FrontierEntry.lease_expires <= now)
+        claimable = (select(FrontierEntry.ip)
+                     .where(FrontierEntry.status.in_([PENDING, IN_PROGRESS]), expired)
+                     .limit(limit))
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(FrontierEntry)
+                .where(FrontierEntry.ip.in_(claimable))
+                .values(status=IN_PROGRESS, lease_owner=token, lease_expires=now + lease_seconds, updated_at=now)
+            )
+            rows = connection.execute(
+                select(FrontierEntry.ip, FrontierEntry.device_info).where(FrontierEntry.lease_owner == token)
+            ).all()
+        return [dict(json.loads(row.device_info) if row.device_info else {}, host=row.ip) for row in rows]
+
+    def frontier_counts(self) -> Dict[str, int]:
+        """Return the number of frontier entries in each status."""
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(FrontierEntry.status, func.count()).group_by(FrontierEntry.status)
+            ).all()
+        return {status: count for status, count in rows}
+
+    def enqueue_address(self, address: str, device_ip: str) -> None:
+        """Queue an additional address seen for a device."""
+        row = {'address': address, 'device_ip': device_ip}
+        if self.writer_thread is None:
+            self._upsert(self.session, DeviceAddress, [row])
+            self.session.commit()
+            return
+        self.write_queue.put((DeviceAddress, row))
+
+    def enqueue_raw_output(self, run_id: str, ip: str, device_type: str, command: str, digest: str) -> None:
+        """Queue a reference to a device's stored raw output."""
+        row = {
+            'run_id': run_id,
+            'ip': ip,
+            'device_type': device_type,
+            'command': command,
+            'digest': digest,
+            'collected_at': time.time()
+        }
+        if self.writer_thread is None:
+            self._upsert(self.session, RawOutput, [row])
+            self.session.commit()
+            return
+        self.write_queue.put((RawOutput, row))
+
+    def enqueue_run_device(self, run_id: str, device_data: Dict[str, Any]) -> None:
+        """Queue a device's snapshot for a crawl run, with its links stored by content hash."""
+        links_hash, links = _link_set(device_data.get('neighbors') or [])
+        row = {
+            'run_id': run_id,
+            'ip': device_data.get('ip', ''),
+            'hostname': device_data.get('hostname', ''),
+            'device_type': device_data.get('device_type', ''),
+            'platform': device_data.get('platform', ''),
+            'version': device_data.get('version', ''),
+            'serial_number': device_data.get('serial_number', ''),
+            'links_hash': links_hash
+        }
+        link_set = {'links_hash': links_hash, 'links': links}
+        if self.writer_thread is None:
+            if links:
+                self._insert_link_sets(self.session, [link_set])
+            self._upsert(self.session, RunDevice, [row])
+            self.session.commit()
+            return
+        if links:
+            self.write_queue.put((_LINK_SET, link_set))
+        self.write_queue.put((RunDevice, row))
+
+    def start_run(self, run_id: str) -> None:
+        """Record that a crawl run started; a resumed run keeps its original start time."""
+        self._insert_new(self.session, CrawlRun, [{'run_id': run_id, 'started_at': time.time()}])
+        self.session.execute(
+            update(CrawlRun).where(CrawlRun.run_id == run_id).values(status=RUN_RUNNING, finished_at=None)
+        )
+        self.session.commit()
+
+    def finish_run(self, run_id: str, status: str) -> int:
+        """Record how a crawl run ended; return the number of devices it snapshotted."""
+        devices = self.session.execute(
+            select(func.count()).select_from(RunDevice).where(RunDevice.run_id == run_id)
+        ).scalar()
+        self.session.execute(
+            update(CrawlRun).where(CrawlRun.run_id == run_id)
+            .values(status=status, finished_at=time.time(), devices=devices)
+        )
+        self.session.commit()
+        return devices
+
+    def latest_run(self) -> Optional[Dict[str, Any]]:
+        """Return the most recently started crawl run, or None."""
+        runs = self.list_runs(limit=1)
+        return runs[0] if runs else None
+
+    def list_runs(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return crawl runs, newest first."""
+        query = select(CrawlRun).order_by(CrawlRun.started_at.desc()).limit(limit)
+        return [
+            {column.name: getattr(run, column.name) for column in CrawlRun.__table__.columns}
+            for run in self.session.execute(query).scalars()
+        ]
+
+    def prune_runs(self, keep: int) -> int:
+        """Delete the snapshots of all but the newest keep runs; return how many runs were removed."""
+        if not keep:
+            return 0
+        old = [run['run_id'] for run in self.list_runs()[keep:]]
+        if not old:
+            return 0
+        for start in range(0, len(old), IN_CHUNK):
+            chunk = old[start:start + IN_CHUNK]
+            self.session.execute(delete(RunDevice).where(RunDevice.run_id.in_(chunk)))
+            self.session.execute(delete(CrawlRun).where(CrawlRun.run_id.in_(chunk)))
+        # Link sets no remaining snapshot refers to
+        self.session.execute(delete(LinkSet).where(
+            ~exists().where(RunDevice.links_hash == LinkSet.links_hash)
+        ))
+        self.session.commit()
+        self.logger.info(f"Pruned {len(old)} old crawl runs")
+        return len(old)
+
+    def enqueue_platform_profile(self, platform: str, device_type: str) -> None:
+        """Queue the device type detected for a platform."""
+        row = {'platform': platform, 'device_type': device_type, 'detected_at': time.time()}
+        if self.writer_thread is None:
+            self._upsert(self.session, PlatformProfile, [row])
+            self.session.commit()
+            return
+        self.write_queue.put((PlatformProfile, row))
+
+    def load_platform_profiles(self) -> Dict[str, str]:
+        """Return the cached device type of every autodetected platform."""
+        rows = self.session.query(PlatformProfile.platform, PlatformProfile.device_type)
+        return {row.platform: row.device_type for row in rows}
+
+    def enqueue_credential_hint(self, key: str, profile: str) -> None:
+        """Queue the credential profile that worked for a subnet or platform."""
+        row = {'key': key, 'profile': profile, 'updated_at': time.time()}
+        if self.writer_thread is None:
+            self._upsert(self.session, CredentialHint, [row])
+            self.session.commit()
+            return
+        self.write_queue.put((CredentialHint, row))
+
+    def load_credential_hints(self) -> Dict[str, str]:
+        """Return the learned credential profile name for each subnet and platform key."""
+        rows = self.session.query(CredentialHint.key, CredentialHint.profile)
+        return {row.key: row.profile for row in rows}
+
+    def iter_raw_outputs(self, run_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Yield each device's output digests by command, from one run or the latest run per device."""
+        latest = func.max(RawOutput.id).label('id')
+        newest = self.session.query(latest).group_by(RawOutput.ip, RawOutput.command)
+        if run_id is not None:
+            newest = newest.filter(RawOutput.run_id == run_id)
+        query = (self.session.query(RawOutput.ip, RawOutput.device_type, RawOutput.command, RawOutput.digest)
+                 .filter(RawOutput.id.in_(newest.subquery().select()))
+                 .order_by(RawOutput.ip)
+                 .execution_options(stream_results=True))
+
+        device = None
+        for row in query.yield_per(1000):
+            if device is None or device['ip'] != row.ip:
+                if device is not None:
+                    yield device
+                device = {'ip': row.ip, 'device_type': row.device_type, 'digests': {}}
+            device['digests'][row.command] = row.digest
+        if device is not None:
+            yield device
+
+    def load_identities(self) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str]]]:
+        """Return (ip, hostname, serial) for stored devices and (address, device_ip) aliases."""
+        devices = self.session.query(Device.ip, Device.hostname, Device.serial_number).all()
+        addresses = self.session.query(DeviceAddress.address, DeviceAddress.device_ip).all()
+        return devices, addresses
+
+    def load_frontier(self) -> Tuple[List[Dict[str, Any]], Set[str]]:
+        """Return unfinished device entries and the IPs already crawled."""
+        remaining = []
+        done = set()
+        for entry in self.session.query(FrontierEntry).yield_per(1000):
+            if entry.status == DONE:
+                done.add(entry.ip)
+            elif entry.device_info:
+                remaining.append(json.loads(entry.device_info))
+        return remaining, done
+
+    def reset_frontier(self) -> None:
+        """Forget the frontier of any previous crawl."""
+        self.session.query(FrontierEntry).delete()
+        self.session.commit()
+
+    def stop_writer(self) -> None:
+        """Flush any queued devices and stop the writer thread."""
+        if self.writer_thread is None:
+            return
+        self.write_queue.put(_STOP)
+        self.writer_thread.join()
+        self.writer_thread = None
+
+    def _writer_loop(self) -> None:
+        """Drain the write queue, committing one batch per transaction."""
+        session = self.Session()
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        try:
+            while True:
+                try:
+                    item = self.write_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    item = None
+
+                if item is _STOP:
+                    break
+                if item is not None:
+                    batch.append(item)
+
+                if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                    self._flush(session, batch)
+                    batch = []
+                    deadline = time.monotonic() + self.flush_interval
+            self._flush(session, batch)
+        finally:
+            session.close()
+
+    def _flush(self, session, batch: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        """Write a batch of queued rows in a single transaction."""
+        if not batch:
+            return
+        started = time.perf_counter()
+        tables: Dict[Any, List[Dict[str, Any]]] = {}
+        for model, row in batch:
+            tables.setdefault(model, []).append(row)
+        try:
+            for model, rows in tables.items():
+                self._write(session, model, rows)
+            if Device in tables:
+                self._replace_links(session, tables[Device])
+            session.commit()
+            self.rows_written += len(tables.get(Device, []))
+            self.logger.info(f"Wrote batch of {len(batch)} rows to database")
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Error writing batch of {len(batch)} rows: {str(e)}")
+            # Retry row by row so one bad device does not drop the whole batch
+            for model, row in batch:
+                try:
+                    self._write(session, model, [row])
+                    if model is Device:
+                        self._replace_links(session, [row])
+                    session.commit()
+                except Exception as row_error:
+                    session.rollback()
+                    table = {_NEW_FRONTIER: FrontierEntry, _LINK_SET: LinkSet}.get(model, model).__tablename__
+                    self.logger.error(f"Error adding {table} row {row.get('ip', row.get('links_hash'))} "
+                                      f"to database: {str(row_error)}")
+                else:
+                    if model is Device:
+                        self.rows_written += 1
+        finally:
+            elapsed = time.perf_counter() - started
+            self.write_seconds += elapsed
+            if self.metrics:
+                self.metrics.observe('db_commit', elapsed)
+                self.metrics.inc('db_rows', len(batch))
+
     def device_exists(self, ip: str) -> bool:
         """Check if a device exists in the database."""
         return self.session.query(Device).filter_by(ip=ip).first() is not None
 
+    def load_fingerprints(self) -> Dict[str, Dict[str, Any]]:
+        """Return the output fingerprints and cached fields of every fingerprinted device, by IP."""
+        rows = self.session.query(
+            Device.ip, Device.version_hash, Device.cdp_hash, Device.neighbors,
+            Device.hostname, Device.serial_number, Device.platform, Device.version
+        ).filter(Device.version_hash.isnot(None), Device.cdp_hash.isnot(None))
+        return {row.ip: row._asdict() for row in rows.yield_per(1000)}
+
     def get_all_devices(self) -> List[Dict[str, Any]]:
         """Retrieve all devices from the database."""
         devices = self.session.query(Device).all()
@@ -89,16 +738,157 @@ class DatabaseManager:
                 result.append(device_dict)
         return result
 
-    def export_to_csv(self, filename: str) -> None:
-        """Export device data to CSV."""
+    def iter_devices(self, include_neighbors: bool = True, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Stream device rows without loading the whole table."""
+        columns = [Device.hostname, Device.ip, Device.device_type, Device.serial_number,
+                   Device.platform, Device.version]
+        if include_neighbors:
+            columns.append(Device.neighbors)
+        query = self.session.query(*columns).execution_options(stream_results=True)
+        for row in query.yield_per(batch_size):
+            yield row._asdict()
+
+    def iter_links(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Stream rows of the links table."""
+        query = self.session.query(
+            Link.local_ip, Link.local_interface, Link.remote_ip, Link.remote_device_id,
+            Link.remote_interface, Link.remote_platform
+        ).execution_options(stream_results=True)
+        for row in query.yield_per(batch_size):
+            yield row._asdict()
+
+    def count_devices(self, filters: Optional[List[Tuple[str, str]]] = None) -> int:
+        """Return the number of devices matching the filters."""
+        with self.engine.connect() as connection:
+            return connection.execute(
+                select(func.count()).select_from(Device).where(*_device_conditions(filters))
+            ).scalar()
+
+    def device_summary(self, column: str, filters: Optional[List[Tuple[str, str]]] = None,
+                       limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Return (value, device count) pairs for one column, most common first."""
+        if column not in DEVICE_FILTER_COLUMNS:
+            raise ValueError(f"Cannot summarize devices by '{column}'")
+        group = getattr(Device, column)
+        query = (select(group, func.count()).where(*_device_conditions(filters))
+                 .group_by(group).order_by(func.count().desc(), group).limit(limit))
+        with self.engine.connect() as connection:
+            return [(value, count) for value, count in connection.execute(query)]
+
+    def list_devices(self, filters: Optional[List[Tuple[str, str]]] = None, limit: int = 50,
+                     offset: int = 0) -> List[Dict[str, Any]]:
+        """Return one page of devices, ordered by hostname, without their neighbor lists."""
+        columns = [getattr(Device, name) for name in DEVICE_FILTER_COLUMNS]
+        # Device.id breaks hostname ties; the hostname index already orders by it
+        query = (select(*columns).where(*_device_conditions(filters))
+                 .order_by(Device.hostname, Device.id).limit(limit).offset(offset))
+        with self.engine.connect() as connection:
+            return [row._asdict() for row in connection.execute(query)]
+
+    def crawl_freshness(self) -> Dict[str, Any]:
+        """Summarize the last crawl from the frontier: entries by status, when they were
+        last updated, and how many stored devices it did not finish."""
+        reached = select(FrontierEntry.ip).where(FrontierEntry.ip == Device.ip, FrontierEntry.status == DONE)
+        with self.engine.connect() as connection:
+            counts = dict(connection.execute(
+                select(FrontierEntry.status, func.count()).group_by(FrontierEntry.status)
+            ).all())
+            first_update, last_update = connection.execute(
+                select(func.min(FrontierEntry.updated_at), func.max(FrontierEntry.updated_at))
+            ).one()
+            not_reached = connection.execute(
+                select(func.count()).select_from(Device).where(~reached.exists())
+            ).scalar() if counts else None
+        return {
+            'frontier': counts,
+            'first_update': first_update,
+            'last_update': last_update,
+            'devices_not_reached': not_reached
+        }
+
+    def diff_runs(self, run_a: str, run_b: str, limit: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Compare two crawl runs' snapshots without loading either inventory.
+
+        Returns added and removed devices, devices whose version or serial
+        changed, and added and dropped links, each as a total count and up
+        to limit rows. Devices are matched on the run_devices primary key;
+        links are only compared for devices whose link set hash differs.
+        """
+        for run_id in (run_a, run_b):
+            if self.session.get(CrawlRun, run_id) is None:
+                raise ValueError(f"No crawl run {run_id}")
+
+        def devices_only_in(first: str, second: str):
+            device, other = aliased(RunDevice), aliased(RunDevice)
+            return (select(device.ip, device.hostname, device.platform, device.version, device.serial_number)
+                    .where(device.run_id == first, ~exists().where(other.run_id == second, other.ip == device.ip))
+                    .order_by(device.ip))
+
+        def links_only_in(first: str, second: str):
+            device, other = aliased(RunDevice), aliased(RunDevice)
+            link, other_link = aliased(LinkSet), aliased(LinkSet)
+            return (select(device.ip, device.hostname, link.local_interface, link.remote_device_id,
+                           link.remote_interface, link.remote_ip)
+                    .select_from(device)
+                    .outerjoin(other, and_(other.run_id == second, other.ip == device.ip))
+                    .join(link, link.links_hash == device.links_hash)
+                    .where(device.run_id == first,
+                           device.links_hash.is_distinct_from(other.links_hash),
+                           ~exists().where(other_link.links_hash == other.links_hash,
+                                           other_link.local_interface == link.local_interface,
+                                           other_link.remote_device_id == link.remote_device_id,
+                                           other_link.remote_interface == link.remote_interface))
+                    .order_by(device.ip, link.local_interface))
+
+        old, new = aliased(RunDevice), aliased(RunDevice)
+        changed = (select(old.ip, new.hostname, old.version.label('old_version'), new.version.label('new_version'),
+                          old.serial_number.label('old_serial'), new.serial_number.label('new_serial'))
+                   .join(new, and_(new.run_id == run_b, new.ip == old.ip))
+                   .where(old.run_id == run_a,
+                          or_(old.version.is_distinct_from(new.version),
+                              old.serial_number.is_distinct_from(new.serial_number)))
+                   .order_by(old.ip))
+
+        sections = {
+            'added_devices': devices_only_in(run_b, run_a),
+            'removed_devices': devices_only_in(run_a, run_b),
+            'changed_devices': changed,
+            'added_links': links_only_in(run_b, run_a),
+            'dropped_links': links_only_in(run_a, run_b)
+        }
+        report = {}
+        with self.engine.connect() as connection:
+            for name, query in sections.items():
+                count = connection.execute(select(func.count()).select_from(query.order_by(None).subquery())).scalar()
+                rows = connection.execute(query.limit(limit)).all() if count else []
+                report[name] = {'count': count, 'rows': [row._asdict() for row in rows]}
+        return report
+
+    def export(self, filename: str, fmt: Optional[str] = None, links_filename: Optional[str] = None) -> None:
+        """Stream devices, and optionally links to a separate file, as CSV, JSON Lines or Parquet; raises on failure."""
+        from export import write_rows
         try:
-            devices = self.get_all_devices()
-            df = pd.DataFrame(devices)
-            df.to_csv(filename, index=False)
+            columns = ['hostname', 'ip', 'device_type', 'serial_number', 'platform', 'version']
+            if links_filename is None:
+                columns.append('neighbors')
+            write_rows(self.iter_devices(include_neighbors=links_filename is None), filename, columns,
+                       fmt=fmt, json_columns=['neighbors'])
             self.logger.info(f"Successfully exported data to {filename}")
+
+            if links_filename:
+                link_columns = ['local_ip', 'local_interface', 'remote_ip', 'remote_device_id',
+                                'remote_interface', 'remote_platform']
+                write_rows(self.iter_links(), links_filename, link_columns, fmt=fmt)
+                self.logger.info(f"Successfully exported links to {links_filename}")
         except Exception as e:
-            self.logger.error(f"Error exporting to CSV: {str(e)}")
+            self.logger.error(f"Error exporting to {filename}: {str(e)}")
+            raise
+
+    def export_to_csv(self, filename: str) -> None:
+        """Export device data to CSV."""
+        self.export(filename, fmt='csv')
 
     def close(self) -> None:
         """Close the database session."""
+        self.stop_writer()
         self.session.close() 
\ No newline at end of file
@@ -0,0 +1,161 @@
+import logging
+import os
+import queue
+import socket
+import time
+from typing import Dict, Any, Callable, List, Optional
+from crawler import CDPCrawler
+from connect import DeviceConnector
+from data import DatabaseManager, PENDING, IN_PROGRESS, DONE, RUN_RUNNING, RUN_COMPLETED, new_run_id
+from identity import identity_keys
+
+def frontier_finished(counts: Dict[str, int]) -> bool:
+    """Return True once a shared frontier has entries and none is pending or in progress."""
+    return bool(counts) and not counts.get(PENDING) and not counts.get(IN_PROGRESS)
+
+class DistributedCrawler(CDPCrawler):
+    """Crawl worker that leases devices from a frontier table shared with other workers.
+
+    Any number of workers, on one host or several, can point at the same
+    database. Each leases a few devices at a time; entries whose lease
+    expires (the worker died) are handed to another worker. Discovered
+    neighbors go back into the shared frontier, where the first insert
+    of an address wins.
+    """
+
+    def __init__(self, config_path: str, config: Optional[Dict[str, Any]] = None,
+                 connector: Optional[DeviceConnector] = None, worker_id: Optional[str] = None):
+        super().__init__(config_path, config, connector)
+        distributed_config = self.config.get('distributed') or {}
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        # Outlives the per-device deadline, so a live worker never loses a device it is still crawling
+        self.lease_seconds = distributed_config.get('lease_seconds') or 2 * self.watchdog.deadline
+        self.lease_batch = distributed_config.get('lease_batch') or self.config['crawler']['max_threads']
+        self.poll_interval = distributed_config.get('poll_interval') or 2.0
+        self.devices_leased = 0
+
+    def _enqueue_targets(self, targets: List[Dict[str, Any]]) -> None:
+        """Add newly discovered devices to the shared frontier for any worker to lease."""
+        for neighbor_info in targets:
+            self.db_manager.enqueue_new_frontier(neighbor_info['host'], neighbor_info)
+
+    def _retry(self, device_info: Dict[str, Any]) -> bool:
+        """Return a failed device to the shared frontier, leasable once its backoff expires."""
+        attempt = device_info.get('attempt', 0) + 1
+        if attempt > self.scheduler.retry_count:
+            return False
+        not_before = time.time() + self.scheduler.delay(attempt)
+        self.db_manager.enqueue_frontier(device_info['host'], PENDING, dict(device_info, attempt=attempt), not_before)
+        return True
+
+    def _lease(self) -> int:
+        """Lease devices while the local queue is short; return how many were leased."""
+        backlog = self.device_queue.qsize()
+        if backlog >= self.lease_batch:
+            return 0
+        leased = self.db_manager.lease_frontier(self.worker_id, self.lease_batch - backlog, self.lease_seconds)
+        for device_info in leased:
+            ip = device_info['host']
+            self.frontier.add(ip)
+            primary = self.identities.claim(ip, identity_keys(device_info.get('device_id', '')))
+            if primary not in (None, ip):
+                # Another address of a device this worker already knows
+                self.db_manager.enqueue_address(ip, primary)
+                self.db_manager.enqueue_frontier(ip, DONE)
+                continue
+            self.device_queue.put(device_info)
+        self.devices_leased += len(leased)
+        return len(leased)
+
+    def _release_backlog(self) -> None:
+        """Hand leased devices this worker never started back to the shared frontier."""
+        now = time.time()
+        while True:
+            try:
+                device_info = self.device_queue.get_nowait()
+            except queue.Empty:
+                return
+            if device_info is not None:
+                self.db_manager.enqueue_frontier(device_info['host'], PENDING, not_before=now)
+
+    def start(self, resume: bool = False) -> None:
+        """Lease and crawl devices until the shared frontier is exhausted."""
+        # Workers snapshot devices into the run the coordinator started; it records the run's end
+        latest = self.db_manager.latest_run()
+        owns_run = not (latest and latest['status'] == RUN_RUNNING)
+        completed = False
+        try:
+            if self.incremental:
+                self.fingerprints = self.db_manager.load_fingerprints()
+                self.logger.info(f"Incremental crawl: {len(self.fingerprints)} stored device fingerprints")
+            if owns_run:
+                self._begin_run()
+            else:
+                self.run_id = latest['run_id']
+            self._load_identities()
+            self.db_manager.start_writer()
+            self._start_parse_stage()
+            self.watchdog.start()
+            for _ in range(self.config['crawler']['max_threads']):
+                self._start_worker()
+
+            self.logger.info(f"Worker {self.worker_id} leasing from {self.config['database']['path']}")
+            while self.is_running:
+                if self._lease():
+                    continue
+                if not self.device_queue.unfinished_tasks and frontier_finished(self.db_manager.frontier_counts()):
+                    self.logger.info(f"Shared frontier exhausted; worker {self.worker_id} "
+                                     f"leased {self.devices_leased} devices")
+                    completed = True
+                    break
+                time.sleep(min(self.poll_interval, 0.2) if self.device_queue.unfinished_tasks else self.poll_interval)
+        except KeyboardInterrupt:
+            self.logger.info("Crawling interrupted by user")
+        finally:
+            self.watchdog.stop()
+            self._stop_workers()
+            self.connector.close()
+            self._release_backlog()
+            self._stop_parse_stage()
+            self.db_manager.stop_writer()
+            if owns_run:
+                self._end_run(completed)
+
+class Coordinator:
+    """Seeds the shared frontier and reports progress while workers crawl it."""
+
+    def __init__(self, config: Dict[str, Any], db_manager: Optional[DatabaseManager] = None):
+        self.config = config
+        self.db_manager = db_manager or DatabaseManager(config['database']['path'])
+        self.poll_interval = (config.get('distributed') or {}).get('poll_interval') or 2.0
+        self.keep_runs = (config.get('history') or {}).get('keep_runs', 30)
+        self.run_id = new_run_id()
+        self.logger = logging.getLogger(__name__)
+
+    def seed(self, resume: bool = False) -> None:
+        """Start a new shared frontier and crawl run from the seed device, or keep the existing ones on resume."""
+        if resume and self.db_manager.frontier_counts():
+            latest = self.db_manager.latest_run()
+            if latest and latest['status'] != RUN_COMPLETED:
+                self.run_id = latest['run_id']
+            self.db_manager.start_run(self.run_id)
+            self.logger.info("Resuming the shared frontier; expired leases will be re-leased")
+            return
+        self.db_manager.start_run(self.run_id)
+        self.db_manager.reset_frontier()
+        seed = self.config['seed_device']
+        self.db_manager.enqueue_frontier(seed['host'], PENDING, seed)
+        self.logger.info(f"Shared frontier seeded with {seed['host']}")
+
+    def wait(self, on_progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+        """Block until no entry is pending or in progress; return the final status counts."""
+        while True:
+            counts = self.db_manager.frontier_counts()
+            if on_progress:
+                on_progress(counts)
+            if frontier_finished(counts):
+                devices = self.db_manager.finish_run(self.run_id, RUN_COMPLETED)
+                self.logger.info(f"Crawl run {self.run_id} recorded {devices} devices")
+                self.db_manager.prune_runs(self.keep_runs)
+                return counts
+            time.sleep(self.poll_interval)
@@ -0,0 +1,82 @@
+import csv
+import json
+import os
+import logging
+from itertools import islice
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Only needed for Parquet export
+    pyarrow = None
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+# Rows buffered per Parquet row group; memory stays bounded by this, not by inventory size
+PARQUET_CHUNK = 10000
+
+logger = logging.getLogger(__name__)
+
+def detect_format(filename: str, fmt: Optional[str] = None) -> str:
+    """Return the export format, inferring it from the file extension if not given."""
+    if fmt:
+        return fmt
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    if extension in ('json', 'jsonl', 'ndjson'):
+        return 'jsonl'
+    if extension in ('parquet', 'pq'):
+        return 'parquet'
+    return 'csv'
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group an iterator of rows into lists of at most size rows."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def write_rows(rows: Iterable[Dict[str, Any]], filename: str, columns: List[str],
+               fmt: Optional[str] = None, json_columns: Iterable[str] = ()) -> int:
+    """Stream rows to a CSV, JSON Lines or Parquet file and return the row count.
+
+    Columns named in json_columns hold serialized JSON; JSON Lines output
+    embeds them as nested values, the other formats keep the string.
+    """
+    fmt = detect_format(filename, fmt)
+    count = 0
+    if fmt == 'csv':
+        with open(filename, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+    elif fmt == 'jsonl':
+        json_columns = set(json_columns)
+        with open(filename, 'w') as f:
+            for row in rows:
+                record = {column: row.get(column) for column in columns}
+                for column in json_columns.intersection(columns):
+                    record[column] = json.loads(record[column]) if record[column] else None
+                f.write(json.dumps(record))
+                f.write('\n')
+                count += 1
+    elif fmt == 'parquet':
+        if pyarrow is None:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+        schema = pyarrow.schema([(column, pyarrow.string()) for column in columns])
+        with pyarrow.parquet.ParquetWriter(filename, schema) as writer:
+            for chunk in _chunks(rows, PARQUET_CHUNK):
+                columns_data = {
+                    column: [None if row.get(column) is None else str(row.get(column)) for row in chunk]
+                    for column in columns
+                }
+                writer.write_table(pyarrow.Table.from_pydict(columns_data, schema=schema))
+                count += len(chunk)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    logger.info(f"Wrote {count} rows to {filename}")
+    return count
@@ -0,0 +1,218 @@
+import re
+from typing import Dict, Any, List, Optional
+
+# The parsers below reproduce the built-in templates rule for rule. They
+# only stand in for a template whose content hashes to one of these
+# digests; an edited template goes back to TextFSM.
+TEMPLATE_DIGESTS = {
+    'show_version': 'b39a36b97dd8343edbe3681ceb44cb8556bbb75c983b8bf0f76f9beeb8ec052f',
+    'show_cdp_neighbors': '300630697ded9ad01c5ea8360ddad5c61fa1cddcec6ff65efe313dda51162098',
+}
+
+# show cdp neighbors detail (templates/show_cdp_neighbors_detail.textfsm)
+CDP_FIELDS = ('NEIGHBOR_NAME', 'MGMT_ADDRESS', 'PLATFORM', 'NEIGHBOR_INTERFACE',
+              'LOCAL_INTERFACE', 'NEIGHBOR_DESCRIPTION', 'CAPABILITIES')
+_DEVICE_ID = re.compile(r'Device ID: (?P<NEIGHBOR_NAME>\S+)')
+_ENTRY_ADDRESSES = re.compile(r'Entry address\(es\)\s*:\s*')
+_PLATFORM_PADDED = re.compile(
+    r'Platform\s*:\s*(?P<PLATFORM>.*)\s*,\s*Capabilities\s*:\s*(?P<CAPABILITIES>.+?)\s+$')
+_PLATFORM = re.compile(r'Platform\s*:\s*(?P<PLATFORM>.*)\s*,\s*Capabilities\s*:\s*(?P<CAPABILITIES>.+?)$')
+_INTERFACE = re.compile(
+    r'Interface: (?P<LOCAL_INTERFACE>.*),  Port ID \(outgoing port\): (?P<NEIGHBOR_INTERFACE>.*)')
+_IP_ADDRESS = re.compile(r'.*IP address: (?P<MGMT_ADDRESS>\d+\.\d+\.\d+\.\d+|\w+\.\w+\.\w+)')
+
+# show version (templates/show_version.textfsm)
+VERSION_FIELDS = ('SOFTWARE_IMAGE', 'VERSION', 'RELEASE', 'ROMMON', 'HOSTNAME', 'UPTIME', 'UPTIME_YEARS',
+                  'UPTIME_WEEKS', 'UPTIME_DAYS', 'UPTIME_HOURS', 'UPTIME_MINUTES', 'RELOAD_REASON',
+                  'RUNNING_IMAGE', 'HARDWARE', 'SERIAL', 'CONFIG_REGISTER', 'MAC_ADDRESS', 'RESTARTED')
+VERSION_LISTS = ('HARDWARE', 'SERIAL', 'MAC_ADDRESS')
+_SOFTWARE = (
+    re.compile(r'.*Software,*\s+\((?P<SOFTWARE_IMAGE>\S+)\),\sVersion\s(?P<VERSION>.+?),*\s+RELEASE.*'
+               r'\((?P<RELEASE>\S+)\)'),
+    re.compile(r'.*Software,*\s+\((?P<SOFTWARE_IMAGE>\S+)\),\sVersion\s(?P<VERSION>.+?),*\s+\S+.*:'
+               r'(?P<RELEASE>\S+)'),
+    re.compile(r'.*Software,*\s+\((?P<SOFTWARE_IMAGE>\S+)\),\sVersion\s(?P<VERSION>.+?),'),
+)
+_ROMMON = re.compile(r'ROM:\s+(?P<ROMMON>\S+)')
+_UPTIME = re.compile(r'\s*(?P<HOSTNAME>\S+)\s+uptime\s+is\s+(?P<UPTIME>.+)')
+_UPTIME_PARTS = (
+    re.compile(r'.*\s+uptime\s+is.*\s+(?P<UPTIME_YEARS>\d+)\syear'),
+    re.compile(r'.*\s+uptime\s+is.*\s+(?P<UPTIME_WEEKS>\d+)\sweek'),
+    re.compile(r'.*\s+uptime\s+is.*\s+(?P<UPTIME_DAYS>\d+)\sday'),
+    re.compile(r'.*\s+uptime\s+is.*\s+(?P<UPTIME_HOURS>\d+)\shour'),
+)
+_UPTIME_MINUTES = re.compile(r'.*\s+uptime\s+is.*\s+(?P<UPTIME_MINUTES>\d+)\sminute')
+_RUNNING_IMAGE = re.compile(r'[sS]ystem\s+image\s+file\s+is\s+"(.*?):(?P<RUNNING_IMAGE>\S+)"')
+_RELOAD_REASON = re.compile(
+    r'(?:[lL]ast\s+reload\s+reason:|System\s+returned\s+to\s+ROM\s+by)\s+(?P<RELOAD_REASON>.+?)\s*$')
+_SERIAL = re.compile(r'[Pp]rocessor\s+board\s+ID\s+(?P<SERIAL>\w+)')
+_HARDWARE = re.compile(r'[Cc]isco\s+(?P<HARDWARE>\S+|\S+\d\S+)\s+\(.+\).+')
+_CONFIG_REGISTER = re.compile(r'[Cc]onfiguration\s+register\s+is\s+(?P<CONFIG_REGISTER>\S+)')
+_MAC_ADDRESS = re.compile(r'Base\s+[Ee]thernet\s+MAC\s+[Aa]ddress\s+:\s+'
+                          r'(?P<MAC_ADDRESS>[0-9a-fA-F]{2}(:[0-9a-fA-F]{2}){5})')
+_RESTARTED = re.compile(r'System\s+restarted\s+at\s+(?P<RESTARTED>.+)$')
+_STACK = re.compile(r'Switch\s+Port|Switch\s\d+')
+_STACK_SERIAL = re.compile(r'[Ss]ystem\s+[Ss]erial\s+[Nn]umber\s+:\s+(?P<SERIAL>\w+)')
+_STACK_HARDWARE = re.compile(r'[Mm]odel\s+[Nn]umber\s+:\s+(?P<HARDWARE>\S+|\S+\d\S+)\s*')
+_STACK_MAC_ADDRESS = re.compile(r'Base [Ee]thernet MAC [Aa]ddress\s+:\s+'
+                                r'(?P<MAC_ADDRESS>[0-9a-fA-F]{2}(:[0-9a-fA-F]{2}){5})')
+
+def _assign(record: Dict[str, Any], match: re.Match) -> None:
+    """Copy a rule's named groups into the record, appending to List values as TextFSM does."""
+    for name, value in match.groupdict().items():
+        if name in VERSION_LISTS:
+            record[name].append(value)
+        else:
+            record[name] = value
+
+def parse_cdp_neighbors_detail(output: str) -> List[Dict[str, str]]:
+    """Parse show cdp neighbors detail in one pass; rows match TextFSM's ParseTextToDicts.
+
+    Each line is tested only against the rules whose literal prefix it
+    starts with, instead of against every rule of the current state.
+    """
+    rows: List[Dict[str, str]] = []
+    record: Dict[str, Any] = dict.fromkeys(CDP_FIELDS)
+
+    def emit() -> None:
+        nonlocal record
+        # NEIGHBOR_NAME is Required: a record without it is dropped
+        if record['NEIGHBOR_NAME']:
+            rows.append({name: value or '' for name, value in record.items()})
+        record = dict.fromkeys(CDP_FIELDS)
+
+    parse_ip = get_version = False
+    for line in (output.splitlines() if output else ()):
+        if get_version:
+            # GetVersion: the line after "Version :" is the description, and ends the record
+            record['NEIGHBOR_DESCRIPTION'] = line
+            emit()
+            get_version = False
+            continue
+        if parse_ip:
+            # ParseIP: only the line after "Entry address(es):" is examined
+            parse_ip = False
+            match = _IP_ADDRESS.match(line) if 'IP address: ' in line else None
+            if match is None and line.startswith('Platform'):
+                match = _PLATFORM_PADDED.match(line) or _PLATFORM.match(line)
+            if match:
+                record.update(match.groupdict())
+            continue
+
+        if line.startswith('Device ID: '):
+            match = _DEVICE_ID.match(line)
+        elif line.startswith('Entry address(es)'):
+            parse_ip = bool(_ENTRY_ADDRESSES.match(line))
+            continue
+        elif line.startswith('Platform'):
+            match = _PLATFORM_PADDED.match(line) or _PLATFORM.match(line)
+        elif line.startswith('Interface: '):
+            match = _INTERFACE.match(line)
+        elif line.startswith('Version :'):
+            get_version = True
+            continue
+        else:
+            continue
+        if match:
+            record.update(match.groupdict())
+
+    # End of input records whatever is pending, like TextFSM's implicit EOF
+    emit()
+    return rows
+
+def parse_show_version(output: str) -> List[Dict[str, Any]]:
+    """Parse show version in one pass; rows match TextFSM's ParseTextToDicts.
+
+    Rules are tried in template order, but a line only reaches a rule's
+    regex when it contains that rule's literal keyword.
+    """
+    record: Dict[str, Any] = dict.fromkeys(VERSION_FIELDS)
+    for name in VERSION_LISTS:
+        record[name] = []
+
+    stack = False
+    for line in (output.splitlines() if output else ()):
+        if not line:
+            # No rule matches an empty line
+            continue
+        if stack:
+            # Stack member details, until the end of the output
+            first = line[:1]
+            match = ((first in 'Ss' and _STACK_SERIAL.match(line))
+                     or (first in 'Mm' and _STACK_HARDWARE.match(line))
+                     or (first in 'Cc' and _CONFIG_REGISTER.match(line))
+                     or (first == 'B' and _STACK_MAC_ADDRESS.match(line)))
+            if match:
+                _assign(record, match)
+            continue
+
+        if 'Software' in line:
+            match = _SOFTWARE[0].match(line) or _SOFTWARE[1].match(line) or _SOFTWARE[2].match(line)
+            if match:
+                _assign(record, match)
+                continue
+        first = line[:1]
+        if first == 'R' and line.startswith('ROM:'):
+            match = _ROMMON.match(line)
+            if match:
+                _assign(record, match)
+                continue
+        if 'uptime' in line:
+            # The uptime rules Continue, so one line can fill several of them
+            for regex in (_UPTIME,) + _UPTIME_PARTS:
+                match = regex.match(line)
+                if match:
+                    _assign(record, match)
+            match = _UPTIME_MINUTES.match(line)
+            if match:
+                _assign(record, match)
+                continue
+        if 'image' in line and first in 'sS':
+            match = _RUNNING_IMAGE.match(line)
+            if match:
+                _assign(record, match)
+                continue
+        if first in 'lLS':
+            match = _RELOAD_REASON.match(line)
+            if match:
+                _assign(record, match)
+                continue
+        if first in 'Pp':
+            match = _SERIAL.match(line)
+            if match:
+                _assign(record, match)
+                continue
+        if first in 'Cc':
+            match = _HARDWARE.match(line) or _CONFIG_REGISTER.match(line)
+            if match:
+                _assign(record, match)
+                continue
+        if first == 'B':
+            match = _MAC_ADDRESS.match(line)
+            if match:
+                _assign(record, match)
+                continue
+        if first == 'S':
+            match = _RESTARTED.match(line)
+            if match:
+                _assign(record, match)
+                continue
+            if _STACK.match(line):
+                stack = True
+
+    # A record in which nothing matched is not output
+    if all(value is None or value == [] for value in record.values()):
+        return []
+    return [{name: '' if value is None else value for name, value in record.items()}]
+
+# Template name -> fast parser, used by Parser when the template's digest matches
+FAST_PARSERS = {
+    'show_version': parse_show_version,
+    'show_cdp_neighbors': parse_cdp_neighbors_detail,
+}
+
+def fast_parser_for(template_name: str, digest: str) -> Optional[Any]:
+    """Return the fast parser for a template, or None if the template differs from the built-in one."""
+    if TEMPLATE_DIGESTS.get(template_name) != digest:
+        return None
+    return FAST_PARSERS.get(template_name)
@@ -0,0 +1,44 @@
+import socket
+import threading
+from typing import Iterable, Set, Union
+
+def ip_key(ip: str) -> Union[int, str]:
+    """Pack a dotted IPv4 address into an int; other addresses are kept as strings."""
+    try:
+        return int.from_bytes(socket.inet_aton(ip), 'big') if ip.count('.') == 3 else ip
+    except OSError:
+        return ip
+
+class Frontier:
+    """Set of every address ever enqueued, with an atomic test-and-set.
+
+    IPv4 addresses are stored as ints, which keeps 100k+ entries to a few
+    megabytes. Addresses are marked when they are enqueued, not when they
+    are dequeued, so each address is queued at most once however many
+    neighbors advertise it.
+    """
+
+    def __init__(self):
+        self._seen: Set[Union[int, str]] = set()
+        self._lock = threading.Lock()
+
+    def add(self, ip: str) -> bool:
+        """Mark ip as enqueued; return False if it already was."""
+        key = ip_key(ip)
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            return True
+
+    def update(self, ips: Iterable[str]) -> None:
+        """Mark many addresses as enqueued."""
+        keys = [ip_key(ip) for ip in ips]
+        with self._lock:
+            self._seen.update(keys)
+
+    def __contains__(self, ip: str) -> bool:
+        return ip_key(ip) in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
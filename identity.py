@@ -0,0 +1,118 @@
+import re
+import threading
+import logging
+from typing import Dict, List, Optional, Set
+
+# NX-OS and some IOS-XE devices advertise "hostname(SERIAL)" as their CDP device ID
+DEVICE_ID_SERIAL = re.compile(r"^(?P<name>[^()]+)\((?P<serial>[^()]+)\)$")
+SERIAL_KEY = 'serial:'
+
+def identity_keys(device_id: str = '', hostname: str = '', serial_number: str = '') -> List[str]:
+    """Return the lookup keys that identify one logical device.
+
+    A serial number is the identity when there is one; names are only
+    used for devices without a serial, as unconfigured boxes share
+    default names such as Switch.
+    """
+    device_id = (device_id or '').strip()
+    match = DEVICE_ID_SERIAL.match(device_id)
+    if match:
+        device_id = match.group('name')
+        serial_number = serial_number or match.group('serial')
+    if serial_number:
+        return [f"{SERIAL_KEY}{serial_number.upper()}"]
+    keys = []
+    if device_id:
+        keys.append(f"name:{device_id.lower()}")
+    if hostname and hostname.lower() != device_id.lower():
+        keys.append(f"name:{hostname.lower()}")
+    return keys
+
+class IdentityIndex:
+    """Maps CDP device IDs, hostnames and serials to one logical device and its addresses."""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, str] = {}  # identity key -> primary IP
+        self._by_address: Dict[str, str] = {}  # any known IP -> primary IP
+        self._addresses: Dict[str, Set[str]] = {}  # primary IP -> all known IPs
+        self._keys: Dict[str, Set[str]] = {}  # primary IP -> its identity keys
+
+    def claim(self, ip: str, keys: List[str]) -> Optional[str]:
+        """Register ip for a device unless it is already known.
+
+        Returns None if the caller should crawl ip, otherwise the primary IP
+        of the device it belongs to. A name only matches a device already
+        crawled that reported no serial.
+        """
+        with self._lock:
+            primary = self._by_address.get(ip)
+            if primary is None:
+                primary = next((self._by_key[key] for key in keys if key in self._by_key), None)
+            # Until the device is crawled, only a serial identifies it: others may share its name
+            keys = [key for key in keys if key.startswith(SERIAL_KEY)]
+            if primary is None:
+                self._by_address[ip] = ip
+                self._addresses[ip] = {ip}
+                self._keys[ip] = set(keys)
+                for key in keys:
+                    self._by_key[key] = ip
+                return None
+            self._add_address(primary, ip, keys)
+            return primary
+
+    def register(self, ip: str, keys: List[str]) -> Optional[str]:
+        """Attach identity keys learned after crawling a device.
+
+        Returns None if ip is a device of its own, otherwise the primary IP
+        of the device already crawled under the same keys, which ip is
+        then recorded as another address of.
+        """
+        with self._lock:
+            primary = self._by_address.setdefault(ip, ip)
+            self._addresses.setdefault(primary, {primary})
+            owner = next((self._by_key[key] for key in keys if self._by_key.get(key, primary) != primary), None)
+            if owner is not None:
+                for address in self._addresses.pop(primary, set()) | {ip}:
+                    self._by_address[address] = owner
+                    self._addresses.setdefault(owner, {owner}).add(address)
+                self._drop_keys(primary)
+                return owner
+            if keys:
+                # Names the device was claimed under no longer identify it once it has a serial
+                self._drop_keys(primary)
+                self._keys[primary] = set(keys)
+                for key in keys:
+                    self._by_key[key] = primary
+            return None
+
+    def add_address(self, primary: str, ip: str) -> None:
+        """Record ip as another address of the device whose primary IP is primary."""
+        with self._lock:
+            self._by_address.setdefault(primary, primary)
+            self._addresses.setdefault(primary, {primary})
+            self._add_address(primary, ip, [])
+
+    def addresses(self, ip: str) -> Set[str]:
+        """Return every address known for the device that owns ip."""
+        with self._lock:
+            primary = self._by_address.get(ip, ip)
+            return set(self._addresses.get(primary, {ip}))
+
+    def _add_address(self, primary: str, ip: str, keys: List[str]) -> None:
+        """Record another address and any new keys for a known device."""
+        self._by_address.setdefault(ip, primary)
+        self._addresses[primary].add(ip)
+        for key in keys:
+            if self._by_key.setdefault(key, primary) == primary:
+                self._keys.setdefault(primary, set()).add(key)
+
+    def _drop_keys(self, primary: str) -> None:
+        """Forget the identity keys held by a device; the caller holds the lock."""
+        for key in self._keys.pop(primary, set()):
+            if self._by_key.get(key) == primary:
+                del self._by_key[key]
+
+    def __len__(self) -> int:
+        return len(self._addresses)
@@ -1,13 +1,16 @@
 import click
 import yaml
-from rich.console import Console
+from rich.console import Console, Group
+from rich.columns import Columns
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.panel import Panel
+from rich.live import Live
 from rich import print as rprint
-from crawler import CDPCrawler
 import os
 import sys
+import logging
+from contextlib import contextmanager
 
 console = Console()
 
@@ -27,6 +30,58 @@ def cli():
     """CDP Network Crawler - Discover and inventory network devices using CDP."""
     pass
 
+def format_seconds(seconds):
+    """Format a duration for the metrics panel."""
+    return f"{seconds * 1000:.1f} ms" if seconds < 1 else f"{seconds:.2f} s"
+
+def metrics_panel(snapshot, title="Crawl Metrics"):
+    """Render a Metrics snapshot as a rich panel: throughput, queues, failures and per-phase latency."""
+    counters = {}
+    failures = {}
+    for counter in snapshot['counters']:
+        if counter['name'] == 'failures':
+            failures[counter['labels'].get('reason', '')] = counter['value']
+        elif counter['name'] == 'devices':
+            counters[f"devices {counter['labels'].get('status', '')}"] = counter['value']
+        else:
+            counters[counter['name']] = counter['value']
+
+    summary = Table(show_header=False, box=None)
+    summary.add_column(style="cyan")
+    summary.add_column(style="green", justify="right")
+    summary.add_row("Elapsed", f"{snapshot['elapsed_seconds']:.0f} s")
+    summary.add_row("Devices/sec", f"{snapshot['devices_per_second']:.1f} "
+                    f"(last 10 s: {snapshot['recent_devices_per_second']:.1f})")
+    for name, value in sorted(counters.items()):
+        summary.add_row(name.replace('_', ' ').capitalize(), f"{value:g}")
+    for name, value in sorted(snapshot['gauges'].items()):
+        summary.add_row(name.replace('_', ' ').capitalize(), "-" if value is None else f"{value:g}")
+    for reason, value in sorted(failures.items()):
+        summary.add_row(f"[red]Failures: {reason}[/red]", f"{value:g}")
+
+    phases = Table(box=None)
+    phases.add_column("Phase", style="cyan")
+    for column in ("Count", "Mean", "p50", "p95", "p99", "Total"):
+        phases.add_column(column, justify="right")
+    for phase in snapshot['phases']:
+        name = phase['phase'] + (f" ({phase['command']})" if 'command' in phase else '')
+        phases.add_row(name, str(phase['count']), *(format_seconds(phase[key]) for key in ('mean', 'p50', 'p95', 'p99')),
+                       f"{phase['sum']:.1f} s")
+    return Panel(Group(summary, "", phases), title=title)
+
+@contextmanager
+def logs_to_stdout():
+    """Point console log handlers at the current sys.stdout, so log lines print above a Live panel."""
+    handlers = [handler for handler in logging.getLogger().handlers
+                if type(handler) is logging.StreamHandler and handler.stream is sys.__stdout__]
+    for handler in handlers:
+        handler.setStream(sys.stdout)
+    try:
+        yield
+    finally:
+        for handler in handlers:
+            handler.setStream(sys.__stdout__)
+
 @cli.command()
 @click.option('--config', '-c', default='config.yaml', 
               callback=validate_config,
@@ -34,7 +89,20 @@ def cli():
 @click.option('--threads', '-t', type=int, help='Number of worker threads')
 @click.option('--timeout', type=int, help='Connection timeout in seconds')
 @click.option('--output', '-o', help='Output CSV file path')
-def crawl(config, threads, timeout, output):
+@click.option('--engine', type=click.Choice(['threads', 'async']),
+              help='Crawl engine: one thread per worker, or asyncio sessions')
+@click.option('--sessions', type=int, help='Concurrent SSH sessions for the async engine')
+@click.option('--resume', is_flag=True, help='Continue the last interrupted crawl instead of starting from the seed')
+@click.option('--incremental', is_flag=True,
+              help='Skip parsing and rewriting devices whose output has not changed since the last crawl')
+@click.option('--worker', is_flag=True, help='Lease devices from the shared frontier alongside other workers')
+@click.option('--coordinator', is_flag=True,
+              help='Seed the shared frontier, wait for workers to drain it, then export')
+@click.option('--worker-id', help='Name this worker records on its leases (default: hostname-pid)')
+@click.option('--metrics-out', type=click.Path(dir_okay=False),
+              help='Write phase timings and counters at the end of the run (.json for JSON, else Prometheus text)')
+def crawl(config, threads, timeout, output, engine, sessions, resume, incremental, worker, coordinator, worker_id,
+          metrics_out):
     """Start the network crawling process."""
     try:
         with Progress(
@@ -54,26 +122,86 @@ def crawl(config, threads, timeout, output):
                 config_data['crawler']['timeout'] = timeout
             if output:
                 config_data['output']['csv_path'] = output
-            
+            if engine:
+                config_data['crawler']['engine'] = engine
+            if sessions:
+                config_data['crawler']['max_sessions'] = sessions
+            if incremental:
+                config_data['crawler']['incremental'] = True
+            if metrics_out:
+                config_data['output']['metrics_path'] = metrics_out
+            if worker and coordinator:
+                raise click.UsageError("--worker and --coordinator are separate processes")
+
+            if coordinator:
+                from distributed import Coordinator
+                crawler = Coordinator(config_data)
+                crawler.seed(resume=resume)
+                progress.update(task, description="Waiting for workers...")
+                counts = crawler.wait(lambda counts: progress.update(
+                    task, description="Waiting for workers... " +
+                    ", ".join(f"{status} {count}" for status, count in sorted(counts.items()))))
+                progress.update(task, description="Exporting results...")
+                crawler.db_manager.export_to_csv(config_data['output']['csv_path'])
+                progress.stop()
+                table = Table(title="Distributed Crawl Summary")
+                table.add_column("Status", style="cyan")
+                table.add_column("Devices", style="green")
+                for status_name, count in sorted(counts.items()):
+                    table.add_row(status_name, str(count))
+                table.add_row("Output File", config_data['output']['csv_path'])
+                console.print(table)
+                return
+
             # Create crawler instance
-            crawler = CDPCrawler(config_path=config)
-            
-            progress.update(task, description="Starting crawl...")
-            crawler.start()
-            
-            progress.update(task, description="Exporting results...")
-            crawler.export_to_csv(config_data['output']['csv_path'])
-            
-            progress.update(task, description="Crawl completed!")
-            
+            if worker:
+                if config_data['crawler'].get('engine', 'threads') == 'async':
+                    raise click.UsageError("Distributed workers use the threads engine")
+                from distributed import DistributedCrawler
+                crawler = DistributedCrawler(config_path=config, config=config_data, worker_id=worker_id)
+            elif config_data['crawler'].get('engine', 'threads') == 'async':
+                from async_crawler import AsyncCDPCrawler
+                crawler = AsyncCDPCrawler(config_path=config, config=config_data)
+            else:
+                from crawler import CDPCrawler
+                crawler = CDPCrawler(config_path=config, config=config_data)
+
+        # Live per-phase panel while the crawl runs; it stays on screen afterwards
+        title = "Resuming crawl" if resume else "Crawling"
+        with Live(get_renderable=lambda: metrics_panel(crawler.metrics.snapshot(), title),
+                  console=console, refresh_per_second=2):
+            with logs_to_stdout():
+                crawler.start(resume=resume)
+
+        metrics_path = config_data['output'].get('metrics_path')
+        if metrics_path:
+            crawler.metrics.write(metrics_path)
+
+        # Workers share one database; the coordinator exports it once they are all done
+        if not worker:
+            with console.status("Exporting results..."):
+                crawler.export_to_csv(config_data['output']['csv_path'])
+
         # Display summary
         table = Table(title="Crawl Summary")
         table.add_column("Metric", style="cyan")
         table.add_column("Value", style="green")
         
         table.add_row("Seed Device", config_data['seed_device']['host'])
-        table.add_row("Threads Used", str(config_data['crawler']['max_threads']))
-        table.add_row("Output File", config_data['output']['csv_path'])
+        if config_data['crawler'].get('engine', 'threads') == 'async':
+            table.add_row("Engine", "async")
+            table.add_row("Max Sessions", str(config_data['crawler'].get('max_sessions', 200)))
+        else:
+            table.add_row("Threads Used", str(config_data['crawler']['max_threads']))
+        if worker:
+            table.add_row("Worker", crawler.worker_id)
+            table.add_row("Devices Leased", str(crawler.devices_leased))
+        else:
+            table.add_row("Output File", config_data['output']['csv_path'])
+        if crawler.incremental:
+            table.add_row("Unchanged Devices", str(crawler.unchanged_devices))
+        if metrics_path:
+            table.add_row("Metrics File", metrics_path)
         
         console.print(table)
         
@@ -96,11 +224,49 @@ def show_config(config):
         border_style="blue"
     ))
 
+def parse_filters(ctx, param, value):
+    """Split --filter FIELD=VALUE options into (field, value) pairs."""
+    from data import DEVICE_FILTER_COLUMNS
+    filters = []
+    for item in value:
+        field, sep, pattern = item.partition('=')
+        if not sep or field not in DEVICE_FILTER_COLUMNS:
+            raise click.BadParameter(f"Expected FIELD=VALUE with FIELD one of {', '.join(DEVICE_FILTER_COLUMNS)}")
+        filters.append((field, pattern))
+    return filters
+
+def format_age(timestamp):
+    """Describe how long ago a Unix timestamp was."""
+    import time
+    seconds = max(0, time.time() - timestamp)
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            return f"{seconds / size:.1f}{unit} ago"
+    return f"{seconds:.0f}s ago"
+
+def summary_table(title, rows, total):
+    """Render (value, count) pairs with each value's share of the total."""
+    table = Table(title=title)
+    table.add_column("Value", style="cyan")
+    table.add_column("Devices", justify="right", style="green")
+    table.add_column("Share", justify="right")
+    for value, count in rows:
+        table.add_row(value or "(unknown)", str(count), f"{100 * count / total:.1f}%" if total else "-")
+    other = total - sum(count for _, count in rows)
+    if other > 0:
+        table.add_row("(other)", str(other), f"{100 * other / total:.1f}%", style="dim")
+    return table
+
 @cli.command()
 @click.option('--config', '-c', default='config.yaml', 
               callback=validate_config,
               help='Path to configuration file')
-def status(config):
+@click.option('--limit', default=50, show_default=True, help='Devices to list (0 to show only summaries)')
+@click.option('--offset', default=0, help='Devices to skip before the listing starts')
+@click.option('--filter', 'filters', multiple=True, metavar='FIELD=VALUE', callback=parse_filters,
+              help='Only include matching devices; * and ? are wildcards. Repeat to combine')
+@click.option('--top', default=10, show_default=True, help='Values shown in each summary')
+def status(config, limit, offset, filters, top):
     """Show the status of the crawl database."""
     try:
         with open(config, 'r') as f:
@@ -109,27 +275,46 @@ def status(config):
         from data import DatabaseManager
         db = DatabaseManager(config_data['database']['path'])
         
-        devices = db.get_all_devices()
+        # Counts and summaries are computed by SQLite, so no device rows are loaded here
+        total = db.count_devices(filters)
+        freshness = db.crawl_freshness()
         
         table = Table(title="Crawl Status")
-        table.add_column("Total Devices", style="cyan")
-        table.add_column("Database Path", style="green")
-        
-        table.add_row(str(len(devices)), config_data['database']['path'])
-        
+        table.add_column("Metric", style="cyan")
+        table.add_column("Value", style="green")
+        table.add_row("Matching Devices" if filters else "Total Devices", str(total))
+        table.add_row("Database Path", config_data['database']['path'])
+        if freshness['frontier']:
+            table.add_row("Last Crawl Activity", format_age(freshness['last_update']))
+            for status_name, count in sorted(freshness['frontier'].items()):
+                table.add_row(f"Frontier {status_name}", str(count))
+            table.add_row("Devices Not Reached", str(freshness['devices_not_reached']))
         console.print(table)
         
+        if total and top:
+            console.print(Columns([
+                summary_table(title, db.device_summary(column, filters, top), total)
+                for title, column in (("By Platform", 'platform'), ("By Version", 'version'),
+                                      ("By Device Type", 'device_type'))
+            ]))
+        
+        devices = db.list_devices(filters, limit, offset) if limit else []
         if devices:
-            device_table = Table(title="Discovered Devices")
+            device_table = Table(title="Discovered Devices",
+                                 caption=f"{offset + 1}-{offset + len(devices)} of {total}")
             device_table.add_column("Hostname", style="cyan")
             device_table.add_column("IP", style="green")
             device_table.add_column("Type", style="yellow")
+            device_table.add_column("Platform")
+            device_table.add_column("Version")
             
             for device in devices:
                 device_table.add_row(
                     device['hostname'],
                     device['ip'],
-                    device['device_type']
+                    device['device_type'],
+                    device['platform'],
+                    device['version']
                 )
             
             console.print(device_table)
@@ -138,5 +323,393 @@ def status(config):
         console.print(f"[red]Error: {str(e)}[/red]")
         sys.exit(1)
 
+def open_database(config):
+    """Open the inventory database named in a config file."""
+    from data import DatabaseManager
+    with open(config, 'r') as f:
+        config_data = yaml.safe_load(f)
+    return DatabaseManager(config_data['database']['path'])
+
+@cli.command()
+@click.option('--config', '-c', default='config.yaml', 
+              callback=validate_config,
+              help='Path to configuration file')
+@click.option('--output', '-o', help='Output file path (defaults to the configured CSV path)')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl', 'parquet']),
+              help='Output format (inferred from the file extension by default)')
+@click.option('--links', help='Write links to this file and leave neighbors out of the device output')
+def export(config, output, fmt, links):
+    """Export the inventory without loading it all into memory."""
+    try:
+        with open(config, 'r') as f:
+            config_data = yaml.safe_load(f)
+        output = output or config_data['output']['csv_path']
+        db = open_database(config)
+        try:
+            with console.status(f"Exporting to {output}..."):
+                db.export(output, fmt=fmt, links_filename=links)
+        finally:
+            db.close()
+        console.print(f"[green]Exported devices to {output}[/green]")
+        if links:
+            console.print(f"[green]Exported links to {links}[/green]")
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        sys.exit(1)
+
+@cli.command()
+@click.option('--config', '-c', default='config.yaml', 
+              callback=validate_config,
+              help='Path to configuration file')
+@click.option('--run', 'run_id', help='Crawl run to re-parse (defaults to the latest output of each device)')
+@click.option('--workers', '-w', type=int, help='Parser processes (defaults to the CPU count)')
+def reparse(config, run_id, workers):
+    """Rebuild device records from stored raw output, without SSH."""
+    import time
+    from reparse import reparse as reparse_outputs
+    try:
+        with open(config, 'r') as f:
+            config_data = yaml.safe_load(f)
+        with console.status("Re-parsing stored output..."):
+            started = time.perf_counter()
+            count = reparse_outputs(config_data, run_id=run_id, workers=workers)
+            elapsed = time.perf_counter() - started
+        console.print(f"[green]Re-parsed {count} devices in {elapsed:.1f}s[/green]")
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        sys.exit(1)
+
+@cli.command()
+@click.option('--config', '-c', default='config.yaml', 
+              callback=validate_config,
+              help='Path to configuration file')
+@click.option('--limit', default=20, show_default=True, help='Number of runs to list')
+def runs(config, limit):
+    """List recorded crawl runs, newest first."""
+    from datetime import datetime
+    try:
+        db = open_database(config)
+        table = Table(title="Crawl Runs")
+        table.add_column("Run", style="cyan")
+        table.add_column("Started", style="green")
+        table.add_column("Duration", justify="right")
+        table.add_column("Status", style="yellow")
+        table.add_column("Devices", justify="right")
+        for run in db.list_runs(limit):
+            started = datetime.fromtimestamp(run['started_at']).strftime('%Y-%m-%d %H:%M:%S') if run['started_at'] else "-"
+            duration = (format_seconds(run['finished_at'] - run['started_at'])
+                        if run['finished_at'] and run['started_at'] else "-")
+            devices = str(run['devices']) if run['devices'] is not None else "-"
+            table.add_row(run['run_id'], started, duration, run['status'] or "-", devices)
+        console.print(table)
+        db.close()
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        sys.exit(1)
+
+# Report sections of main.py diff: (key, title, (column, header) pairs)
+DEVICE_COLUMNS = (('hostname', "Hostname"), ('ip', "IP"), ('platform', "Platform"), ('version', "Version"))
+LINK_COLUMNS = (('hostname', "Hostname"), ('local_interface', "Local Interface"),
+                ('remote_device_id', "Neighbor"), ('remote_interface', "Neighbor Interface"))
+DIFF_SECTIONS = (
+    ('added_devices', "Added Devices", DEVICE_COLUMNS),
+    ('removed_devices', "Removed Devices", DEVICE_COLUMNS),
+    ('changed_devices', "Changed Devices", (('hostname', "Hostname"), ('ip', "IP"), ('old_version', "Old Version"),
+                                            ('new_version', "New Version"), ('old_serial', "Old Serial"),
+                                            ('new_serial', "New Serial"))),
+    ('added_links', "Added Links", LINK_COLUMNS),
+    ('dropped_links', "Dropped Links", LINK_COLUMNS),
+)
+
+@cli.command()
+@click.argument('run_a')
+@click.argument('run_b')
+@click.option('--config', '-c', default='config.yaml', 
+              callback=validate_config,
+              help='Path to configuration file')
+@click.option('--limit', default=50, show_default=True, help='Rows shown in each section (0 for counts only)')
+@click.option('--json', 'as_json', is_flag=True, help='Print the report as JSON')
+def diff(run_a, run_b, config, limit, as_json):
+    """Show what changed between crawl runs RUN_A and RUN_B (see main.py runs)."""
+    import json
+    try:
+        db = open_database(config)
+        report = db.diff_runs(run_a, run_b, limit)
+        db.close()
+        if as_json:
+            click.echo(json.dumps(report, indent=2))
+            return
+
+        summary = Table(title=f"Changes from {run_a} to {run_b}")
+        summary.add_column("Change", style="cyan")
+        summary.add_column("Count", justify="right", style="green")
+        for key, title, _ in DIFF_SECTIONS:
+            summary.add_row(title, str(report[key]['count']))
+        console.print(summary)
+
+        for key, title, columns in DIFF_SECTIONS:
+            section = report[key]
+            if not section['rows']:
+                continue
+            table = Table(title=title, caption=f"{len(section['rows'])} of {section['count']}")
+            for _, header in columns:
+                table.add_column(header)
+            for row in section['rows']:
+                table.add_row(*(row[column] or "" for column, _ in columns))
+            console.print(table)
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        sys.exit(1)
+
+@cli.group()
+def topology():
+    """Query the discovered CDP topology."""
+    pass
+
+@topology.command()
+@click.argument('device')
+@click.option('--config', '-c', default='config.yaml', 
+              callback=validate_config,
+              help='Path to configuration file')
+def neighbors(device, config):
+    """List the CDP neighbors of DEVICE (IP, hostname or CDP device ID)."""
+    from topology import Topology
+    try:
+        db = open_database(config)
+        topo = Topology(db)
+        ip = topo.resolve(device)
+        if ip is None:
+            console.print(f"[red]Unknown device: {device}[/red]")
+            sys.exit(1)
+
+        table = Table(title=f"Neighbors of {device} ({ip})")
+        table.add_column("Local Interface", style="cyan")
+        table.add_column("Neighbor", style="green")
+        table.add_column("Neighbor IP", style="green")
+        table.add_column("Neighbor Interface", style="yellow")
+        table.add_column("Platform", style="magenta")
+        for link in topo.neighbors(ip):
+            table.add_row(
+                link['local_interface'],
+                link['remote_device_id'],
+                link['remote_ip'],
+                link['remote_interface'],
+                link['remote_platform']
+            )
+        console.print(table)
+        db.close()
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        sys.exit(1)
+
+@topology.command()
+@click.argument('source')
+@click.argument('target')
+@click.option('--config', '-c', default='config.yaml', 
+              callback=validate_config,
+              help='Path to configuration file')
+@click.option('--max-hops', default=32, help='Give up after this many hops')
+def path(source, target, config, max_hops):
+    """Show a shortest CDP path between SOURCE and TARGET."""
+    from topology import Topology
+    try:
+        db = open_database(config)
+        topo = Topology(db)
+        endpoints = [topo.resolve(source), topo.resolve(target)]
+        for name, ip in zip((source, target), endpoints):
+            if ip is None:
+                console.print(f"[red]Unknown device: {name}[/red]")
+                sys.exit(1)
+
+        hops = topo.path(endpoints[0], endpoints[1], max_hops=max_hops)
+        if hops is None:
+            console.print(f"[yellow]No path within {max_hops} hops[/yellow]")
+            return
+
+        hostnames = topo.hostnames(hops)
+        table = Table(title=f"Path from {source} to {target} ({len(hops) - 1} hops)")
+        table.add_column("Hop", style="cyan", justify="right")
+        table.add_column("Hostname", style="green")
+        table.add_column("IP", style="yellow")
+        for hop, ip in enumerate(hops):
+            table.add_row(str(hop), hostnames.get(ip, ''), ip)
+        console.print(table)
+        db.close()
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        sys.exit(1)
+
+@topology.command()
+@click.argument('device', required=False)
+@click.option('--config', '-c', default='config.yaml', 
+              callback=validate_config,
+              help='Path to configuration file')
+@click.option('--top', default=20, help='Number of devices to list when no DEVICE is given')
+def degree(device, config, top):
+    """Show the neighbor count of DEVICE, or the most connected devices."""
+    from topology import Topology
+    try:
+        db = open_database(config)
+        topo = Topology(db)
+        if device:
+            ip = topo.resolve(device)
+            if ip is None:
+                console.print(f"[red]Unknown device: {device}[/red]")
+                sys.exit(1)
+            console.print(f"{device} ({ip}) has {topo.degree(ip)} neighbors")
+        else:
+            table = Table(title=f"Top {top} Devices by Link Count")
+            table.add_column("Hostname", style="cyan")
+            table.add_column("IP", style="green")
+            table.add_column("Links", style="yellow", justify="right")
+            for ip, hostname, links in topo.top_degrees(top):
+                table.add_row(hostname, ip, str(links))
+            console.print(table)
+        db.close()
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        sys.exit(1)
+
+@topology.command()
+@click.option('--config', '-c', default='config.yaml', 
+              callback=validate_config,
+              help='Path to configuration file')
+def rebuild(config):
+    """Rebuild the links table from stored device neighbor lists."""
+    try:
+        db = open_database(config)
+        with console.status("Rebuilding links..."):
+            count = db.rebuild_links()
+        console.print(f"[green]Rebuilt {count} links[/green]")
+        db.close()
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        sys.exit(1)
+
+def parse_duration(ctx, param, value):
+    """Convert a duration such as '200ms', '1.5s' or '0.2' to seconds."""
+    try:
+        if value.endswith('ms'):
+            return float(value[:-2]) / 1000
+        if value.endswith('s'):
+            return float(value[:-1])
+        return float(value)
+    except ValueError:
+        raise click.BadParameter(f"Invalid duration '{value}'")
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+@cli.command()
+@click.option('--config', '-c', default='config.yaml', 
+              callback=validate_config,
+              help='Path to configuration file')
+@click.option('--nodes', '-n', default=1000, help='Number of simulated devices')
+@click.option('--latency', default='0ms', callback=parse_duration,
+              help='Simulated latency per command and login, e.g. 200ms')
+@click.option('--failure-rate', default=0.0, help='Fraction of logins that fail')
+@click.option('--threads', '-t', type=int, help='Number of worker threads')
+@click.option('--fanout', default=4, help='Children per device in the generated topology')
+@click.option('--multihomed', default=0.0, help='Fraction of devices advertising a second management address')
+@click.option('--phones', default=0.0, help='Fraction of switches with an IP phone neighbor (no SSH)')
+@click.option('--credential-sets', default=1, help='Number of regions, each accepting a different login')
+@click.option('--recorded', type=click.Path(exists=True),
+              help='YAML file of recorded outputs (IP -> command -> output) instead of a generated topology')
+@click.option('--engine', type=click.Choice(['threads', 'async']), default='threads',
+              help='Crawl engine; async crawls real SSH sessions to a simulated network on loopback addresses')
+@click.option('--sessions', type=int, help='Concurrent SSH sessions for the async engine')
+def bench(config, nodes, latency, failure_rate, threads, fanout, multihomed, phones, credential_sets, recorded,
+          engine, sessions):
+    """Benchmark crawler throughput against a simulated network."""
+    import resource
+    import tempfile
+    import time
+    from simulator import SimulatedNetwork, SimulatedConnector, SimulatedSSHNetwork
+
+    try:
+        with open(config, 'r') as f:
+            config_data = yaml.safe_load(f)
+        if threads:
+            config_data['crawler']['max_threads'] = threads
+        if sessions:
+            config_data['crawler']['max_sessions'] = sessions
+        config_data['output']['log_level'] = 'WARNING'
+
+        if recorded:
+            if engine == 'async':
+                raise click.UsageError("--recorded devices have no loopback addresses to serve; use --engine threads")
+            network = SimulatedNetwork.from_recordings(recorded)
+        else:
+            network = SimulatedNetwork.generate(nodes, fanout=fanout, multihomed=multihomed, phones=phones,
+                                                credential_sets=credential_sets, loopback=engine == 'async')
+            if credential_sets > 1:
+                config_data['credentials'] = [
+                    {'name': f"region{n}", 'username': f"netops{n}", 'password': 'simulated'}
+                    for n in range(credential_sets)
+                ]
+        config_data['seed_device']['host'] = network.seed_ip
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config_data['database']['path'] = os.path.join(tmp_dir, 'bench.db')
+            config_data.setdefault('raw_store', {})['path'] = os.path.join(tmp_dir, 'raw_outputs')
+            if engine == 'async':
+                from async_crawler import AsyncCDPCrawler
+                # Every device listens on its own port, which neighbors are dialled on through ssh_ports
+                connector = SimulatedSSHNetwork(network, latency=latency, failure_rate=failure_rate)
+                connector.start()
+                config_data['ssh_ports'] = dict(connector.ports)
+                config_data['seed_device'].update(port=connector.ports[network.seed_ip], device_type='cisco_ios')
+                # The simulated devices answer exec requests only, which SSHDetect's interactive probe cannot use
+                config_data.setdefault('profiles', {})['autodetect'] = False
+                crawler = AsyncCDPCrawler(config_path=config, config=config_data)
+            else:
+                from crawler import CDPCrawler
+                connector = SimulatedConnector(config_data, network, latency=latency, failure_rate=failure_rate)
+                crawler = CDPCrawler(config_path=config, config=config_data, connector=connector)
+
+            try:
+                with console.status(f"Crawling {len(network)} simulated devices..."):
+                    started = time.perf_counter()
+                    crawler.start()
+                    elapsed = time.perf_counter() - started
+            finally:
+                if engine == 'async':
+                    connector.stop()
+
+            db = crawler.db_manager
+            latencies = sorted(connector.latencies)
+            peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+            table = Table(title="Crawl Benchmark")
+            table.add_column("Metric", style="cyan")
+            table.add_column("Value", style="green", justify="right")
+            table.add_row("Simulated Devices", str(len(network)))
+            if engine == 'async':
+                table.add_row("Sessions", str(crawler.max_sessions))
+            else:
+                table.add_row("Threads", str(config_data['crawler']['max_threads']))
+            table.add_row("Latency per Command", f"{latency * 1000:.0f} ms")
+            table.add_row("Devices Crawled", str(len(latencies)))
+            table.add_row("Devices Stored", str(db.rows_written))
+            table.add_row("Login Attempts", str(connector.login_attempts))
+            table.add_row("Failed Logins", str(connector.failed_logins))
+            table.add_row("Wall Time", f"{elapsed:.2f} s")
+            table.add_row("Devices/sec", f"{len(latencies) / elapsed:.1f}" if elapsed else "-")
+            for pct in (50, 95, 99):
+                table.add_row(f"p{pct} Device Latency", f"{percentile(latencies, pct) * 1000:.1f} ms")
+            table.add_row("DB Write Time", f"{db.write_seconds:.3f} s")
+            table.add_row("Peak RSS", f"{peak_rss_mb:.1f} MB")
+            console.print(table)
+            console.print(metrics_panel(crawler.metrics.snapshot(), "Phase Breakdown"))
+            db.close()
+
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        sys.exit(1)
+
 if __name__ == '__main__':
     cli() 
\ No newline at end of file
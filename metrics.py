@@ -0,0 +1,208 @@
+import bisect
+import json
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+
+# Upper bounds, in seconds, of the phase latency histogram buckets
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# Prefix of every exported metric name
+NAMESPACE = 'cdp_crawler'
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+class Histogram:
+    """Fixed-bucket latency histogram, cheap enough to update on every device."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the bucket that holds it, clamped to the observed range."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = max(self.min, self.buckets[index - 1] if index else 0.0)
+                upper = min(self.max, self.buckets[index]) if index < len(self.buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'max': self.max
+        }
+
+class Metrics:
+    """Thread-safe phase timings, counters and gauges for one crawl.
+
+    Phases (connect, command, parse, db_commit, queue_wait, device) are
+    recorded as histograms. Counters track outcomes such as finished
+    devices and failures by reason. Gauges are read from callables
+    when a snapshot is taken, so queue depths cost nothing between
+    snapshots.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._histograms: Dict[Labels, Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        # (time, finished devices) samples behind the recent throughput figure
+        self._samples: deque = deque(maxlen=64)
+
+    def observe(self, phase: str, seconds: float, **labels: Any) -> None:
+        """Record how long one occurrence of a phase took."""
+        key = _labels(dict(labels, phase=phase))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, phase: str, **labels: Any) -> Iterator[None]:
+        """Time the enclosed block as one occurrence of a phase, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started, **labels)
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        """Add to a counter."""
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def track(self, name: str, source: Callable[[], float]) -> None:
+        """Register a gauge whose value is read from source at snapshot time."""
+        self._gauges[name] = source
+
+    def counter(self, name: str, **labels: Any) -> float:
+        """Return the current value of one counter."""
+        with self._lock:
+            return self._counters.get((name, _labels(labels)), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return every metric as plain data, plus overall and recent throughput."""
+        now = time.monotonic()
+        with self._lock:
+            phases = [dict(labels, **histogram.summary()) for labels, histogram in
+                      ((dict(key), histogram) for key, histogram in sorted(self._histograms.items()))]
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            finished = sum(value for (name, _), value in self._counters.items() if name == 'devices')
+            self._samples.append((now, finished))
+            window = [sample for sample in self._samples if now - sample[0] <= 10.0] or [self._samples[-1]]
+        gauges = {}
+        for name, source in list(self._gauges.items()):
+            try:
+                gauges[name] = source()
+            except Exception:
+                gauges[name] = None
+        elapsed = now - self.started
+        recent_seconds = now - window[0][0]
+        return {
+            'elapsed_seconds': elapsed,
+            'devices_finished': finished,
+            'devices_per_second': finished / elapsed if elapsed else 0.0,
+            'recent_devices_per_second': (finished - window[0][1]) / recent_seconds if recent_seconds else 0.0,
+            'phases': phases,
+            'counters': counters,
+            'gauges': gauges
+        }
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {NAMESPACE}_elapsed_seconds gauge",
+                 f"{NAMESPACE}_elapsed_seconds {snapshot['elapsed_seconds']:.3f}"]
+        for name, value in sorted(snapshot['gauges'].items()):
+            if value is not None:
+                lines += [f"# TYPE {NAMESPACE}_{name} gauge", f"{NAMESPACE}_{name} {value}"]
+
+        typed = set()
+        for counter in snapshot['counters']:
+            metric = f"{NAMESPACE}_{counter['name']}_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_format_labels(_labels(counter['labels']))} {counter['value']:g}")
+
+        metric = f"{NAMESPACE}_phase_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            for labels, histogram in histograms:
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{_format_labels(labels, ('le', str(bound)))} {cumulative}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self) -> str:
+        """Render a snapshot of the metrics as JSON."""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def write(self, path: str) -> None:
+        """Write the metrics to a file: JSON for a .json path, Prometheus text otherwise."""
+        content = self.to_json() if path.endswith('.json') else self.to_prometheus()
+        with open(path, 'w') as f:
+            f.write(content)
+
+class TimedQueue(queue.Queue):
+    """FIFO queue that reports how long each item waited before it was taken."""
+
+    def __init__(self, on_wait: Callable[[float], None], maxsize: int = 0):
+        super().__init__(maxsize)
+        self.on_wait = on_wait
+
+    def _put(self, item: Any) -> None:
+        self.queue.append((time.monotonic(), item))
+
+    def _get(self) -> Any:
+        queued_at, item = self.queue.popleft()
+        # Shutdown sentinels are not work, so their wait is not reported
+        if item is not None:
+            self.on_wait(time.monotonic() - queued_at)
+        return item
+
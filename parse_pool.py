@@ -0,0 +1,54 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+from connect import DeviceConnector, VERSION_COMMAND, CDP_COMMAND
+
+# Per-process parser, created once by init_parser in each pool process
+_connector: Optional[DeviceConnector] = None
+
+def init_parser(config: Dict[str, Any]) -> None:
+    """Compile the TextFSM templates once for a pool process."""
+    global _connector
+    logging.basicConfig(
+        level=getattr(logging, config.get('output', {}).get('log_level', 'INFO')),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    _connector = DeviceConnector(config)
+
+def parse_outputs(device_info: Dict[str, Any], outputs: Dict[str, str]) -> Dict[str, Any]:
+    """Build a device record from collected output inside a pool process."""
+    return _connector.parse_device_info(device_info, outputs[VERSION_COMMAND], outputs[CDP_COMMAND])
+
+def timed_parse(connector: DeviceConnector, device_info: Dict[str, Any],
+                outputs: Dict[str, str]) -> Tuple[Dict[str, Any], float]:
+    """Build a device record and return it with the seconds parsing took."""
+    started = time.perf_counter()
+    device_data = connector.parse_device_info(device_info, outputs[VERSION_COMMAND], outputs[CDP_COMMAND])
+    return device_data, time.perf_counter() - started
+
+def parse_outputs_timed(device_info: Dict[str, Any], outputs: Dict[str, str]) -> Tuple[Dict[str, Any], float]:
+    """parse_outputs for callers that record parse time; the clock runs inside the pool process."""
+    return timed_parse(_connector, device_info, outputs)
+
+def create_parse_pool(config: Dict[str, Any], processes: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """Return a process pool for parsing, or None when parsing should stay in-process."""
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 0:
+        return None
+    # Spawned rather than forked: the crawler already runs threads that may hold locks
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_parser,
+        initargs=(config,)
+    )
+
+def completed(result: Any) -> Future:
+    """Wrap a result that needs no parsing in an already finished future."""
+    future = Future()
+    future.set_result(result)
+    return future
@@ -1,53 +1,168 @@
 import textfsm
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, List, Optional
+import copy
+import hashlib
 import logging
 import os
+import re
+import threading
+from fast_parser import fast_parser_for
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Built-in templates, used for any entry missing from the config's templates section
+DEFAULT_TEMPLATES = {
+    'show_version': os.path.join(TEMPLATE_DIR, "show_version.textfsm"),
+    'show_cdp_neighbors': os.path.join(TEMPLATE_DIR, "show_cdp_neighbors_detail.textfsm"),
+}
+
+# Lines that change between runs without the device changing (uptime, CDP holdtime, CLI timestamps)
+VOLATILE_LINES = re.compile(
+    r"^(.*\suptime\s+is\s.*|Switch\s+Uptime\s*:.*|Holdtime\s*:.*|Load\s+for\s.*|Time\s+source\s+is.*)$",
+    re.MULTILINE
+)
+
+def output_fingerprint(output: str) -> str:
+    """Hash command output with volatile lines removed."""
+    stable = VOLATILE_LINES.sub('', output or '')
+    return hashlib.sha256(stable.encode()).hexdigest()
+
+class TemplateRegistry:
+    """Compiles each TextFSM template once and hands out per-thread copies."""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._compiled: Dict[str, textfsm.TextFSM] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def digest(self, path: str) -> Optional[str]:
+        """Return the SHA-256 of a template file's content, or None if it cannot be read."""
+        try:
+            with open(path, 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def load(self, path: str) -> bool:
+        """Read and compile a template file, unless it is already registered."""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._compiled:
+                return True
+            try:
+                with open(path) as f:
+                    self._compiled[path] = textfsm.TextFSM(f)
+                self.logger.debug(f"Compiled template {path}")
+                return True
+            except Exception as e:
+                self.logger.error(f"Error loading template {path}: {str(e)}")
+                return False
+
+    def get(self, path: str) -> Optional[textfsm.TextFSM]:
+        """Return this thread's reset copy of a compiled template."""
+        path = os.path.abspath(path)
+        cache = getattr(self._local, 'templates', None)
+        if cache is None:
+            cache = self._local.templates = {}
+
+        template = cache.get(path)
+        if template is None:
+            if not self.load(path):
+                return None
+            # Deep copy keeps the compiled rules but gives the thread its own record state
+            template = cache[path] = copy.deepcopy(self._compiled[path])
+        template.Reset()
+        return template
+
+# Shared by every Parser so templates are compiled once per process
+registry = TemplateRegistry()
 
 class Parser:
     """Handles parsing of device output using TextFSM templates."""
 
-    def __init__(self):
+    def __init__(self, templates: Optional[Dict[str, str]] = None):
         self.logger = logging.getLogger(__name__)
-        self.template_dir = "templates"
+        self.templates = self._resolve_templates(templates or {})
+        for path in self.templates.values():
+            registry.load(path)
+
+        # Unmodified built-in templates are parsed by the single-pass parsers in fast_parser.py
+        self.fast_parsers: Dict[str, Callable[[str], List[Dict[str, Any]]]] = {}
+        for name, path in self.templates.items():
+            fast_parser = fast_parser_for(name, registry.digest(path))
+            if fast_parser:
+                self.fast_parsers[name] = fast_parser
+            elif os.path.abspath(path) == os.path.abspath(DEFAULT_TEMPLATES.get(name, '')):
+                self.logger.warning(f"Built-in template {path} has changed; parsing {name} with TextFSM only")
+
+    def _resolve_templates(self, templates: Dict[str, str]) -> Dict[str, str]:
+        """Merge configured template paths over the built-in defaults."""
+        resolved = dict(DEFAULT_TEMPLATES)
+        for name, path in templates.items():
+            if not os.path.isabs(path) and not os.path.exists(path):
+                # Relative paths in config.yaml may be relative to the project directory
+                path = os.path.join(os.path.dirname(TEMPLATE_DIR), path)
+            if os.path.exists(path):
+                resolved[name] = path
+            elif name in resolved:
+                self.logger.warning(f"Template {path} for {name} not found, using {resolved[name]}")
+            else:
+                self.logger.warning(f"Template {path} for {name} not found, skipping")
+        return resolved
 
     def _parse_with_template(self, template_name: str, output: str) -> List[Dict[str, Any]]:
-        """Parse output using a TextFSM template."""
+        """Parse output into rows keyed by the template's Value names."""
+        fast_parser = self.fast_parsers.get(template_name)
+        if fast_parser:
+            try:
+                return fast_parser(output)
+            except Exception as e:
+                self.logger.warning(f"Fast parser for {template_name} failed, falling back to TextFSM: {str(e)}")
         try:
-            template_path = os.path.join(self.template_dir, template_name)
-            with open(template_path) as f:
-                template = textfsm.TextFSM(f)
-                return template.ParseText(output)
+            template = registry.get(self.templates[template_name])
+            if template is None:
+                return []
+            return template.ParseTextToDicts(output)
         except Exception as e:
             self.logger.error(f"Error parsing with template {template_name}: {str(e)}")
             return []
 
     def parse_version(self, output: str) -> Dict[str, Any]:
         """Parse show version output."""
-        parsed = self._parse_with_template("show_version.textfsm", output)
+        parsed = self._parse_with_template("show_version", output)
         if parsed:
+            row = parsed[0]
             return {
-                'hostname': parsed[0][4],  # HOSTNAME
-                'version': parsed[0][1],   # VERSION
-                'platform': parsed[0][12], # HARDWARE (first item)
-                'serial_number': parsed[0][13],  # SERIAL (first item)
-                'rommon': parsed[0][3],    # ROMMON
-                'config_register': parsed[0][15],  # CONFIG_REGISTER
-                'mac_address': parsed[0][16],  # MAC_ADDRESS (first item)
-                'uptime': parsed[0][5]     # UPTIME
+                'hostname': row.get('HOSTNAME', ''),
+                'version': row.get('VERSION', ''),
+                'platform': self._first(row.get('HARDWARE')),
+                'serial_number': self._first(row.get('SERIAL')),
+                'rommon': row.get('ROMMON', ''),
+                'config_register': row.get('CONFIG_REGISTER', ''),
+                'mac_address': self._first(row.get('MAC_ADDRESS')),
+                'uptime': row.get('UPTIME', '')
             }
         return {}
 
+    @staticmethod
+    def _first(values: Any) -> str:
+        """Return the first item of a TextFSM List value (or a plain value from a custom template)."""
+        if isinstance(values, list):
+            return values[0] if values else ''
+        return values or ''
+
     def parse_cdp_neighbors(self, output: str) -> List[Dict[str, Any]]:
         """Parse show cdp neighbors detail output."""
-        parsed = self._parse_with_template("show_cdp_neighbors_detail.textfsm", output)
+        parsed = self._parse_with_template("show_cdp_neighbors", output)
         neighbors = []
         for entry in parsed:
             neighbors.append({
-                'device_id': entry[0],     # NEIGHBOR_NAME
-                'ip': entry[1],            # MGMT_ADDRESS
-                'platform': entry[2],       # PLATFORM
-                'local_interface': entry[4],  # LOCAL_INTERFACE
-                'neighbor_interface': entry[3],  # NEIGHBOR_INTERFACE
-                'capabilities': entry[6]    # CAPABILITIES
+                'device_id': entry.get('NEIGHBOR_NAME', ''),
+                'ip': entry.get('MGMT_ADDRESS', ''),
+                'platform': entry.get('PLATFORM', ''),
+                'local_interface': entry.get('LOCAL_INTERFACE', ''),
+                'neighbor_interface': entry.get('NEIGHBOR_INTERFACE', ''),
+                'capabilities': entry.get('CAPABILITIES', '')
             })
-        return neighbors 
\ No newline at end of file
+        return neighbors
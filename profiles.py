@@ -0,0 +1,57 @@
+import logging
+import re
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+# Device type that makes the connector ask Netmiko's SSHDetect before logging in
+AUTODETECT = 'autodetect'
+
+# Ordered (CDP platform pattern, Netmiko device type) rules; the first match wins
+PLATFORM_RULES: List[Tuple[str, str]] = [
+    (r'\bN\dK-|Nexus', 'cisco_nxos'),
+    (r'ASR9K|ASR-9\d{3}|\bNCS|\bCRS|XRv|(?<![\w-])8\d{3}-', 'cisco_xr'),
+    (r'\bASA', 'cisco_asa'),
+    (r'^cisco\b', 'cisco_ios'),
+]
+
+class ProfileResolver:
+    """Chooses the Netmiko device type for a CDP neighbor before it is contacted.
+
+    Platform strings with no matching rule are autodetected once; the
+    result is learned per platform so later devices of the same model
+    connect directly.
+    """
+
+    def __init__(self, config: Dict[str, Any], learned: Optional[Dict[str, str]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.autodetect = config.get('autodetect', True)
+        self.default = config.get('default_device_type', 'cisco_ios')
+        # Rules from config.yaml are checked before the built-in ones
+        rules = list(config.get('platforms', {}).items()) + PLATFORM_RULES
+        self.rules = [(re.compile(pattern, re.IGNORECASE), device_type) for pattern, device_type in rules]
+        self.learned: Dict[str, str] = dict(learned or {})
+        self._lock = threading.Lock()
+
+    def device_type(self, platform: str) -> str:
+        """Return the device type to connect with for a CDP platform string."""
+        platform = (platform or '').strip()
+        with self._lock:
+            learned = self.learned.get(platform)
+        if learned:
+            return learned
+        for pattern, device_type in self.rules:
+            if pattern.search(platform):
+                return device_type
+        return AUTODETECT if self.autodetect and platform else self.default
+
+    def learn(self, platform: str, device_type: str) -> bool:
+        """Remember an autodetected device type; return True if it is new for the platform."""
+        platform = (platform or '').strip()
+        if not platform or device_type == AUTODETECT:
+            return False
+        with self._lock:
+            if self.learned.get(platform) == device_type:
+                return False
+            self.learned[platform] = device_type
+        self.logger.info(f"Platform {platform} detected as {device_type}")
+        return True
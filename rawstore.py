@@ -0,0 +1,46 @@
+import hashlib
+import logging
+import os
+import threading
+import zlib
+from typing import Optional
+
+class RawOutputStore:
+    """Content-addressed, zlib-compressed store for raw command output.
+
+    Each output is saved once under the SHA-256 of its text, so an
+    unchanged device costs no extra space however many runs record it.
+    """
+
+    def __init__(self, root: str, compression_level: int = 6):
+        self.root = root
+        self.compression_level = compression_level
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest: str) -> str:
+        """Spread blobs over 256 directories to keep each one small."""
+        return os.path.join(self.root, digest[:2], digest[2:] + '.z')
+
+    def put(self, output: str) -> str:
+        """Save output if it is not already stored and return its digest."""
+        data = (output or '').encode()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary name first so readers never see a partial blob
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(zlib.compress(data, self.compression_level))
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        """Return the output stored under digest, or None if it is missing."""
+        try:
+            with open(self._path(digest), 'rb') as f:
+                return zlib.decompress(f.read()).decode()
+        except (OSError, zlib.error) as e:
+            self.logger.error(f"Error reading raw output {digest}: {str(e)}")
+            return None
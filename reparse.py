@@ -0,0 +1,53 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional
+from connect import VERSION_COMMAND, CDP_COMMAND
+from data import DatabaseManager
+from parse_pool import init_parser, parse_outputs
+from rawstore import RawOutputStore
+
+logger = logging.getLogger(__name__)
+
+# Per-process store handle, created once by _init_worker in each pool process
+_store: Optional[RawOutputStore] = None
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    """Build the parser and store handles for one pool process."""
+    global _store
+    init_parser(config)
+    _store = RawOutputStore(config.get('raw_store', {}).get('path', 'raw_outputs'))
+
+def _reparse_device(device: Dict[str, Any]) -> Dict[str, Any]:
+    """Load one device's stored output and parse it with the current templates."""
+    outputs = {command: _store.get(device['digests'].get(command, '')) for command in (VERSION_COMMAND, CDP_COMMAND)}
+    if None in outputs.values():
+        return {}
+    return parse_outputs({'host': device['ip'], 'device_type': device['device_type']}, outputs)
+
+def reparse(config: Dict[str, Any], run_id: Optional[str] = None, workers: Optional[int] = None) -> int:
+    """Rebuild device records from stored raw output across a process pool; return the count."""
+    db_config = config['database']
+    db_manager = DatabaseManager(
+        db_config['path'],
+        batch_size=db_config.get('batch_size', 200),
+        flush_interval=db_config.get('flush_interval', 1.0),
+        queue_size=db_config.get('queue_size', 5000)
+    )
+    count = 0
+    db_manager.start_writer()
+    try:
+        # Spawned rather than forked, as the database writer thread is already running
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(config,)) as pool:
+            for device_data in pool.map(_reparse_device, db_manager.iter_raw_outputs(run_id), chunksize=64):
+                if device_data:
+                    db_manager.enqueue_device(device_data)
+                    count += 1
+    finally:
+        db_manager.stop_writer()
+        db_manager.close()
+    logger.info(f"Re-parsed {count} devices from stored output")
+    return count
@@ -0,0 +1,161 @@
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+class RetryScheduler:
+    """Holds failed devices until their exponential backoff expires, then re-queues them.
+
+    Waiting happens on the scheduler's own thread, so a worker hands a
+    failed device over and moves straight on to the next one.
+    """
+
+    def __init__(self, target_queue: queue.Queue, retry_count: int = 3, retry_delay: float = 5.0,
+                 max_delay: float = 300.0):
+        self.target_queue = target_queue
+        self.retry_count = retry_count
+        self.retry_delay = retry_delay
+        self.max_delay = max_delay
+        self.logger = logging.getLogger(__name__)
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        # Devices not yet on the target queue, including ones taken off the heap but not yet put
+        self._pending = 0
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the thread that releases devices whose backoff has expired."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="retry-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop releasing devices; anything still waiting is dropped."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def retry(self, device_info: Dict[str, Any]) -> bool:
+        """Schedule another attempt; return False once the retry budget is spent."""
+        attempt = device_info.get('attempt', 0) + 1
+        if attempt > self.retry_count:
+            return False
+        delay = self.delay(attempt)
+        device_info = dict(device_info, attempt=attempt)
+        self.logger.info(f"Retrying {device_info['host']} in {delay:.1f}s (attempt {attempt}/{self.retry_count})")
+        with self._condition:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._counter), device_info))
+            self._pending += 1
+            self._condition.notify()
+        return True
+
+    def delay(self, attempt: int) -> float:
+        """Backoff before the given retry attempt, doubling each time up to max_delay."""
+        # The exponent is capped so a large retry_count cannot overflow the float conversion
+        return min(self.max_delay, self.retry_delay * 2 ** min(attempt - 1, 64))
+
+    def pending(self) -> int:
+        """Number of devices waiting for their next attempt and not yet back on the target queue.
+
+        Lock-free, so callers holding the target queue's mutex can read it.
+        """
+        return self._pending
+
+    def _run(self) -> None:
+        """Move devices to the target queue as their backoff expires."""
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                now = time.monotonic()
+                due = []
+                while self._heap and self._heap[0][0] <= now:
+                    due.append(heapq.heappop(self._heap)[2])
+                if not due:
+                    self._condition.wait(timeout=self._heap[0][0] - now if self._heap else None)
+                    continue
+            # put() takes the queue mutex, so it must not run under _condition: a thread
+            # holding that mutex may be waiting on this scheduler
+            for device_info in due:
+                self.target_queue.put(device_info)
+                with self._condition:
+                    self._pending -= 1
+
+class DeadlineWatchdog:
+    """Abandons devices that exceed a hard per-device wall-clock deadline.
+
+    A worker blocked on a dead device cannot be interrupted, so on expiry
+    the device's connection is closed and on_expire is called to account
+    for it and replace the worker. The late worker learns from finish()
+    that its result was abandoned.
+    """
+
+    def __init__(self, deadline: float, on_expire: Callable[[Dict[str, Any], Any, threading.Thread], None],
+                 interval: float = 1.0):
+        self.deadline = deadline
+        self.on_expire = on_expire
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+        self._in_flight: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start checking in-flight devices against the deadline."""
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="deadline-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the watchdog thread."""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def begin(self, device_info: Dict[str, Any]) -> None:
+        """Start the clock for a device handled by the calling thread."""
+        with self._lock:
+            self._in_flight[device_info['host']] = {
+                'device_info': device_info,
+                'started': time.monotonic(),
+                'connection': None,
+                'thread': threading.current_thread()
+            }
+
+    def attach(self, ip: str, connection: Any) -> None:
+        """Remember a device's connection so it can be closed on expiry."""
+        with self._lock:
+            if ip in self._in_flight:
+                self._in_flight[ip]['connection'] = connection
+
+    def in_flight(self) -> int:
+        """Return the number of devices currently being worked on."""
+        with self._lock:
+            return len(self._in_flight)
+
+    def finish(self, ip: str) -> bool:
+        """Stop the clock; return False if the device was already abandoned."""
+        with self._lock:
+            return self._in_flight.pop(ip, None) is not None
+
+    def _run(self) -> None:
+        """Abandon every device that has run past the deadline."""
+        while not self._stopped.wait(self.interval):
+            now = time.monotonic()
+            with self._lock:
+                expired = [ip for ip, entry in self._in_flight.items() if now - entry['started'] > self.deadline]
+                entries = [self._in_flight.pop(ip) for ip in expired]
+            for entry in entries:
+                self.logger.warning(f"Device {entry['device_info']['host']} exceeded the "
+                                    f"{self.deadline}s deadline, moving it aside")
+                self.on_expire(entry['device_info'], entry['connection'], entry['thread'])
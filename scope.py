@@ -0,0 +1,91 @@
+import bisect
+import ipaddress
+import logging
+import re
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from frontier import ip_key
+
+class PrefixIndex:
+    """CIDR prefixes merged into sorted address intervals for O(log n) membership tests."""
+
+    def __init__(self, prefixes: Iterable[str]):
+        self.logger = logging.getLogger(__name__)
+        ranges: Dict[int, List[Tuple[int, int]]] = {4: [], 6: []}
+        for prefix in prefixes:
+            try:
+                network = ipaddress.ip_network(str(prefix).strip(), strict=False)
+            except ValueError:
+                self.logger.warning(f"Ignoring invalid prefix {prefix}")
+                continue
+            ranges[network.version].append((int(network.network_address), int(network.broadcast_address)))
+
+        # Overlapping and adjacent prefixes collapse, so one bisect answers each lookup
+        self._starts: Dict[int, List[int]] = {}
+        self._ends: Dict[int, List[int]] = {}
+        for version, intervals in ranges.items():
+            merged: List[List[int]] = []
+            for start, end in sorted(intervals):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self._starts[version] = [start for start, _ in merged]
+            self._ends[version] = [end for _, end in merged]
+
+    def __contains__(self, ip: str) -> bool:
+        # IPv4, the common case, skips the much slower ipaddress parse
+        value = ip_key(ip)
+        version = 4
+        if not isinstance(value, int):
+            try:
+                address = ipaddress.ip_address(ip)
+            except ValueError:
+                return False
+            value, version = int(address), address.version
+        starts = self._starts[version]
+        index = bisect.bisect_right(starts, value) - 1
+        return index >= 0 and value <= self._ends[version][index]
+
+    def __len__(self) -> int:
+        return sum(len(starts) for starts in self._starts.values())
+
+class ScopeFilter:
+    """Decides at enqueue time whether a CDP neighbor is inside the crawl scope.
+
+    Neighbor checks run cheapest first: capabilities, the CIDR include
+    and exclude lists, then hostname and platform patterns. The hop
+    depth limit applies to every neighbor of a device at once.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.include = PrefixIndex(config.get('include') or [])
+        self.exclude = PrefixIndex(config.get('exclude') or [])
+        self.capabilities = set(config.get('capabilities') or [])
+        self.max_depth = config.get('max_depth')
+        self.patterns = [
+            (field, re.compile(config[key], re.IGNORECASE), key.endswith('_include'))
+            for field, key in (('device_id', 'hostname_include'), ('device_id', 'hostname_exclude'),
+                               ('platform', 'platform_include'), ('platform', 'platform_exclude'))
+            if config.get(key)
+        ]
+
+    def within_depth(self, depth: int) -> bool:
+        """Return whether a device this many hops from the seed may be crawled."""
+        return self.max_depth is None or depth <= self.max_depth
+
+    def reason(self, neighbor: Dict[str, Any]) -> Optional[str]:
+        """Return why a neighbor is out of scope, or None if it should be crawled."""
+        if self.capabilities:
+            advertised = set((neighbor.get('capabilities') or '').split())
+            # Neighbors that advertise no capabilities are given the benefit of the doubt
+            if advertised and not advertised & self.capabilities:
+                return 'capabilities'
+        ip = neighbor.get('ip', '')
+        if len(self.include) and ip not in self.include:
+            return 'not in include prefixes'
+        if len(self.exclude) and ip in self.exclude:
+            return 'excluded prefix'
+        for field, pattern, include in self.patterns:
+            if bool(pattern.search(neighbor.get(field) or '')) != include:
+                return f"{field} filter"
+        return None
@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import paramiko
+
+SessionKey = Tuple[str, int]
+
+class JumpHost:
+    """One SSH transport to a bastion host, carrying a direct-tcpip channel per device session.
+
+    The bastion handshake happens once per crawl rather than once per
+    device; each device session then costs a single channel open over
+    the existing transport. The transport is reopened if it drops.
+    """
+
+    def __init__(self, config: Dict[str, Any], timeout: float = 30):
+        self.host = config['host']
+        self.port = config.get('port', 22)
+        self.username = config.get('username')
+        self.password = config.get('password')
+        self.key_file = config.get('key_file')
+        self.keepalive = config.get('keepalive', 30)
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        self._client: Optional[paramiko.SSHClient] = None
+        self._lock = threading.Lock()
+
+    def _transport(self) -> paramiko.Transport:
+        """Return the live bastion transport, connecting first if there is none; raises on failure."""
+        with self._lock:
+            transport = self._client.get_transport() if self._client else None
+            if transport is not None and transport.is_active():
+                return transport
+            if self._client:
+                self._client.close()
+            client = paramiko.SSHClient()
+            # Same trust model as the device sessions, which Netmiko opens without strict host key checking
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            client.connect(
+                self.host,
+                port=self.port,
+                username=self.username,
+                password=self.password,
+                key_filename=self.key_file,
+                allow_agent=not self.password,
+                look_for_keys=not (self.password or self.key_file),
+                timeout=self.timeout,
+                auth_timeout=self.timeout,
+                banner_timeout=self.timeout
+            )
+            transport = client.get_transport()
+            transport.set_keepalive(self.keepalive)
+            self._client = client
+            self.logger.info(f"Connected to jump host {self.host}")
+            return transport
+
+    def open_channel(self, host: str, port: int = 22) -> paramiko.Channel:
+        """Open a channel to a device through the bastion, for use as Netmiko's sock; raises on failure."""
+        return self._transport().open_channel('direct-tcpip', (host, port), ('127.0.0.1', 0), timeout=self.timeout)
+
+    def close(self) -> None:
+        """Close the bastion transport and every channel on it."""
+        with self._lock:
+            if self._client:
+                self._client.close()
+                self._client = None
+
+class SessionPool:
+    """Bounded pool of idle, logged-in device sessions, keyed by address and port.
+
+    A worker takes a session out for its own use and hands it back when
+    it is done with it. Sessions idle for longer than idle_timeout, and
+    the least recently used ones once size are idle, are closed.
+    """
+
+    def __init__(self, size: int, idle_timeout: float, close: Callable[[Any], None]):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.close = close
+        # Key -> (time returned, session, login details); oldest first
+        self._idle: 'OrderedDict[SessionKey, Tuple[float, Any, Dict[str, Any]]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    def _expired(self, now: float) -> List[Any]:
+        """Remove and return sessions past the idle timeout; the caller holds the lock."""
+        expired = []
+        while self._idle:
+            key, (returned, session, _) = next(iter(self._idle.items()))
+            if now - returned < self.idle_timeout:
+                break
+            del self._idle[key]
+            expired.append(session)
+        return expired
+
+    def acquire(self, key: SessionKey) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """Take the idle session for a key, with the login it was opened with, or None."""
+        if not self.size:
+            return None
+        with self._lock:
+            expired = self._expired(time.monotonic())
+            entry = self._idle.pop(key, None)
+        # Closing can block on the network, so it happens outside the lock
+        for session in expired:
+            self.close(session)
+        return entry[1:] if entry else None
+
+    def release(self, key: SessionKey, session: Any, login: Dict[str, Any]) -> None:
+        """Keep a session for reuse, closing whatever it displaces."""
+        if not self.size:
+            self.close(session)
+            return
+        now = time.monotonic()
+        with self._lock:
+            evicted = self._expired(now)
+            previous = self._idle.pop(key, None)
+            if previous:
+                evicted.append(previous[1])
+            self._idle[key] = (now, session, login)
+            while len(self._idle) > self.size:
+                evicted.append(self._idle.popitem(last=False)[1][1])
+        for stale in evicted:
+            self.close(stale)
+
+    def close_all(self) -> None:
+        """Close every idle session."""
+        with self._lock:
+            sessions = [session for _, session, _ in self._idle.values()]
+            self._idle.clear()
+        for session in sessions:
+            self.close(session)
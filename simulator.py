@@ -0,0 +1,422 @@
+import asyncio
+import random
+import re
+import threading
+import time
+import weakref
+import yaml
+import logging
+from typing import Dict, Any, List, Optional
+from netmiko import NetmikoAuthenticationException
+from connect import DeviceConnector
+from profiles import AUTODETECT
+
+try:
+    import asyncssh
+except ImportError:  # Only needed for SimulatedSSHNetwork
+    asyncssh = None
+
+VERSION_TEMPLATE = """Cisco IOS Software, C3750E Software (C3750E-UNIVERSALK9-M), Version {version}, RELEASE SOFTWARE (fc3)
+Technical Support: http://www.cisco.com/techsupport
+
+ROM: Bootstrap program is C3750E boot loader
+
+{hostname} uptime is {uptime}
+System returned to ROM by power-on
+System image file is "flash:/c3750e-universalk9-mz.bin"
+
+cisco {platform} (PowerPC405) processor (revision A0) with 262144K bytes of memory.
+Processor board ID {serial_number}
+Base ethernet MAC Address       : {mac_address}
+Configuration register is 0xF
+"""
+
+CDP_ENTRY_TEMPLATE = """-------------------------
+Device ID: {hostname}
+Entry address(es):
+  IP address: {ip}
+Platform: cisco {platform},  Capabilities: Switch IGMP
+Interface: {local_interface},  Port ID (outgoing port): {neighbor_interface}
+Holdtime : 150 sec
+
+Version :
+Cisco IOS Software, Version {version}
+
+"""
+
+PHONE_ENTRY_TEMPLATE = """-------------------------
+Device ID: SEP{mac}
+Entry address(es):
+  IP address: {ip}
+Platform: Cisco IP Phone 8845,  Capabilities: Host Phone Two-port Mac Relay
+Interface: {local_interface},  Port ID (outgoing port): Port 1
+Holdtime : 150 sec
+
+Version :
+sip8845_65.14-0-1
+
+"""
+
+PLATFORMS = ("WS-C3750X-48P", "WS-C3850-48P", "C9300-48P", "WS-C2960X-48FPD-L")
+VERSIONS = ("15.0(2)SE11", "15.2(7)E4", "16.12.5", "17.6.4")
+
+class SimulatedNetwork:
+    """Serves show command output for a generated or recorded topology."""
+
+    def __init__(self, outputs: Dict[str, Dict[str, str]], usernames: Optional[Dict[str, str]] = None):
+        self.outputs = outputs
+        self.usernames = usernames or {}  # Login each device accepts; any login if absent
+
+    @classmethod
+    def generate(cls, nodes: int, fanout: int = 4, extra_links: float = 0.1,
+                 multihomed: float = 0.0, phones: float = 0.0, credential_sets: int = 1,
+                 seed: int = 0, loopback: bool = False) -> 'SimulatedNetwork':
+        """Build a tree of switches with a fraction of redundant cross links.
+
+        A multihomed fraction of devices advertise a second management
+        address to every other neighbor. A phones fraction of switches
+        also see an IP phone, which has no SSH service. With several
+        credential_sets, the devices of each /24 accept only the login
+        netops<n>, with n cycling across subnets. With loopback, device
+        addresses are taken from 127.0.0.0/8, so SimulatedSSHNetwork can
+        listen on each of them.
+        """
+        rng = random.Random(seed)
+        primary, alternate, alternate_base = (127, 127, 128) if loopback else (10, 172, 16)
+        devices = []
+        for index in range(nodes):
+            # 254 hosts per /24, skipping the network and broadcast addresses
+            subnet = index // 254
+            devices.append({
+                'ip': f"{primary}.{subnet // 256 % 128}.{subnet % 256}.{index % 254 + 1}",
+                'hostname': f"sw{index:05d}",
+                'platform': rng.choice(PLATFORMS),
+                'version': rng.choice(VERSIONS),
+                'serial_number': f"FDO{index:08d}",
+                'mac_address': ':'.join(f"{(index >> shift) & 0xff:02x}" for shift in (40, 32, 24, 16, 8, 0)),
+                'uptime': f"{rng.randint(1, 50)} weeks, {rng.randint(0, 6)} days, {rng.randint(0, 23)} hours",
+                'alt_ip': (f"{alternate}.{alternate_base + subnet // 256 % 16}.{subnet % 256}.{index % 254 + 1}"
+                           if rng.random() < multihomed else None)
+            })
+
+        links: Dict[int, List[int]] = {index: [] for index in range(nodes)}
+        for index in range(1, nodes):
+            parent = (index - 1) // fanout
+            links[index].append(parent)
+            links[parent].append(index)
+        for _ in range(int(nodes * extra_links)):
+            a, b = rng.randrange(nodes), rng.randrange(nodes)
+            if a != b and b not in links[a]:
+                links[a].append(b)
+                links[b].append(a)
+
+        outputs = {}
+        usernames = {}
+        for index, device in enumerate(devices):
+            entries = []
+            for port, neighbor_index in enumerate(links[index], start=1):
+                neighbor = dict(devices[neighbor_index])
+                if neighbor['alt_ip'] and index % 2:
+                    neighbor['ip'] = neighbor['alt_ip']
+                entries.append(CDP_ENTRY_TEMPLATE.format(
+                    local_interface=f"GigabitEthernet1/0/{port}",
+                    neighbor_interface=f"GigabitEthernet1/0/{links[neighbor_index].index(index) + 1}",
+                    **neighbor
+                ))
+            if rng.random() < phones:
+                entries.append(PHONE_ENTRY_TEMPLATE.format(
+                    mac=f"{index:012X}",
+                    ip=f"192.168.{index // 254 % 256}.{index % 254 + 1}",
+                    local_interface=f"GigabitEthernet1/0/{len(links[index]) + 1}"
+                ))
+            outputs[device['ip']] = {
+                'show version': VERSION_TEMPLATE.format(**device),
+                'show cdp neighbors detail': ''.join(entries)
+            }
+            if credential_sets > 1:
+                usernames[device['ip']] = f"netops{index // 254 % credential_sets}"
+            if device['alt_ip']:
+                outputs[device['alt_ip']] = outputs[device['ip']]
+                if device['ip'] in usernames:
+                    usernames[device['alt_ip']] = usernames[device['ip']]
+        return cls(outputs, usernames)
+
+    @classmethod
+    def from_recordings(cls, path: str) -> 'SimulatedNetwork':
+        """Load recorded output from a YAML mapping of IP -> command -> output."""
+        with open(path, 'r') as f:
+            return cls(yaml.safe_load(f))
+
+    @property
+    def seed_ip(self) -> str:
+        """Address of the first device, used as the crawl seed."""
+        return next(iter(self.outputs))
+
+    def __len__(self) -> int:
+        return len({id(output) for output in self.outputs.values()})
+
+class SimulatedConnection:
+    """Stand-in for a Netmiko connection to a simulated device."""
+
+    def __init__(self, connector: 'SimulatedConnector', host: str, started: float):
+        self.connector = connector
+        self.host = host
+        self.started = started
+
+    def send_command(self, command: str) -> str:
+        """Return the recorded output after the configured latency."""
+        self.connector.delay(command)
+        return self.connector.network.outputs[self.host].get(command, '')
+
+    def is_alive(self) -> bool:
+        return True
+
+    def finish(self) -> None:
+        """Record how long this device session took, once."""
+        if self.started is not None:
+            self.connector.record_latency(time.perf_counter() - self.started)
+            self.started = None
+
+    def disconnect(self) -> None:
+        self.finish()
+
+class SimulatedConnector(DeviceConnector):
+    """DeviceConnector that talks to a SimulatedNetwork instead of real devices."""
+
+    def __init__(self, config: Dict[str, Any], network: SimulatedNetwork, latency: float = 0.0,
+                 command_latency: Optional[Dict[str, float]] = None, failure_rate: float = 0.0,
+                 seed: int = 0):
+        super().__init__(config)
+        self.network = network
+        self.latency = latency
+        self.command_latency = command_latency or {}
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.latencies: List[float] = []
+        self.login_attempts = 0
+        self.failed_logins = 0
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def delay(self, command: str) -> None:
+        """Sleep for the latency configured for a command."""
+        latency = self.command_latency.get(command, self.latency)
+        if latency:
+            time.sleep(latency)
+
+    def record_latency(self, seconds: float) -> None:
+        """Store one per-device session duration."""
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def _login(self, host: str, username: Optional[str]) -> None:
+        """Simulate one SSH login, raising if it fails."""
+        self.delay('connect')
+        expected = self.network.usernames.get(host)
+        with self._lock:
+            self.login_attempts += 1
+            failed = (self.random.random() < self.failure_rate or host not in self.network.outputs
+                      or expected not in (None, username))
+            if failed:
+                self.failed_logins += 1
+        if host not in self.network.outputs:
+            raise ConnectionError("no such simulated device")
+        if expected not in (None, username):
+            raise NetmikoAuthenticationException("simulated authentication failure")
+        if failed:
+            raise ConnectionError("simulated connection failure")
+
+    def release(self, device_info: Dict[str, Any], connection: SimulatedConnection) -> None:
+        """End the session's timing when the crawler is done with it, even if it is pooled."""
+        connection.finish()
+        super().release(device_info, connection)
+
+    def _detect(self, device_info: Dict[str, Any]) -> str:
+        """Simulate Netmiko autodetection, which costs a login of its own."""
+        self._login(device_info['host'], device_info.get('username'))
+        return 'cisco_ios'
+
+    def _open(self, device_info: Dict[str, Any]) -> SimulatedConnection:
+        """Simulate an SSH login, failing at the configured rate or on a wrong username."""
+        started = time.perf_counter()
+        if device_info['device_type'] == AUTODETECT:
+            device_info['device_type'] = self._detect(device_info)
+        self._login(device_info['host'], device_info.get('username'))
+        self.logger.info(f"Successfully connected to {device_info['host']}")
+        return SimulatedConnection(self, device_info['host'], started)
+
+class SimulatedSSHServer(asyncssh.SSHServer if asyncssh else object):
+    """asyncssh server for one simulated device, accepting the login its network expects."""
+
+    def __init__(self, service: 'SimulatedSSHNetwork', host: str):
+        self.service = service
+        self.host = host
+        self.started: Optional[float] = None
+        self.authenticated = False
+
+    def connection_made(self, conn: Any) -> None:
+        self.started = time.perf_counter()
+        self.service.connections.add(conn)
+        if self.service.dropped():
+            conn.close()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if self.authenticated:
+            self.service.record_latency(time.perf_counter() - self.started)
+
+    def begin_auth(self, username: str) -> bool:
+        return True
+
+    def password_auth_supported(self) -> bool:
+        return True
+
+    async def validate_password(self, username: str, password: str) -> bool:
+        await asyncio.sleep(self.service.latency)
+        self.authenticated = self.service.accepts(self.host, username)
+        return self.authenticated
+
+class SimulatedSSHNetwork:
+    """Serves a SimulatedNetwork over SSH, one asyncssh listener per device address.
+
+    Each address gets its own port on the loopback interface, so the
+    network must be generated with loopback=True. ports maps every
+    address to its port, for the crawler's ssh_ports. The listeners run
+    on an event loop of their own, in a background thread, so a crawler
+    in the same process can talk to them with real SSH sessions.
+
+    Devices answer exec requests and interactive shells. With
+    single_session, like classic IOS, each connection serves one session
+    and is then closed, and a second session on it is refused by
+    dropping the connection.
+    """
+
+    def __init__(self, network: SimulatedNetwork, latency: float = 0.0, failure_rate: float = 0.0,
+                 seed: int = 0, single_session: bool = True):
+        if asyncssh is None:
+            raise RuntimeError("The simulated SSH network requires asyncssh (pip install asyncssh)")
+        self.network = network
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.single_session = single_session
+        self.random = random.Random(seed)
+        self.ports: Dict[str, int] = {}
+        self.connections: 'weakref.WeakSet[Any]' = weakref.WeakSet()  # Open server-side connections
+        self._served: 'weakref.WeakSet[Any]' = weakref.WeakSet()  # Connections that have had their session
+        self.latencies: List[float] = []
+        self.login_attempts = 0
+        self.failed_logins = 0
+        self._lock = threading.Lock()
+        self._listeners: List[Any] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self.logger = logging.getLogger(__name__)
+
+    def dropped(self) -> bool:
+        """Decide whether the configured failure rate drops a new connection, counting it as a failed login."""
+        with self._lock:
+            failed = self.random.random() < self.failure_rate
+            if failed:
+                self.login_attempts += 1
+                self.failed_logins += 1
+        return failed
+
+    def accepts(self, host: str, username: str) -> bool:
+        """Return whether a device accepts a login, counting the attempt."""
+        accepted = self.network.usernames.get(host) in (None, username)
+        with self._lock:
+            self.login_attempts += 1
+            if not accepted:
+                self.failed_logins += 1
+        return accepted
+
+    def record_latency(self, seconds: float) -> None:
+        """Store one per-device session duration."""
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def _output(self, host: str, command: str) -> str:
+        """Return the device's recorded output for a command, or the IOS error for an unknown one."""
+        outputs = self.network.outputs[host]
+        if command in outputs:
+            return outputs[command]
+        if command.startswith('terminal '):
+            return ''
+        return "% Invalid input detected at '^' marker.\n"
+
+    async def _shell(self, host: str, process: Any) -> None:
+        """Run an interactive shell: echo each command line, print its output and the prompt."""
+        match = re.search(r'^(\S+) uptime is', self.network.outputs[host].get('show version', ''), re.M)
+        prompt = f"{match.group(1) if match else 'Switch'}#"
+        process.stdout.write(prompt)
+        while True:
+            line = await process.stdin.readline()
+            command = line.strip()
+            if not line or command in ('exit', 'quit', 'logout'):
+                break
+            if command:
+                await asyncio.sleep(self.latency)
+                process.stdout.write(self._output(host, command))
+            process.stdout.write(prompt)
+
+    async def _serve(self, host: str, process: Any) -> None:
+        """Answer one session, an exec request or an interactive shell."""
+        connection = process.get_extra_info('connection')
+        if self.single_session and connection in self._served:
+            connection.close()
+            return
+        self._served.add(connection)
+        try:
+            if process.command is None:
+                await self._shell(host, process)
+            else:
+                await asyncio.sleep(self.latency)
+                process.stdout.write(self._output(host, process.command))
+            process.exit(0)
+        finally:
+            if self.single_session:
+                connection.close()
+
+    async def _listen(self) -> None:
+        """Open a listener on each device address."""
+        host_key = asyncssh.generate_private_key('ssh-ed25519')
+        for host in self.network.outputs:
+            listener = await asyncssh.create_server(
+                lambda host=host: SimulatedSSHServer(self, host), host, 0,
+                server_host_keys=[host_key],
+                process_factory=lambda process, host=host: self._serve(host, process)
+            )
+            self._listeners.append(listener)
+            self.ports[host] = listener.get_port()
+
+    async def _close(self) -> None:
+        """Close the listeners, then any connection still open, and wait for their sessions to end."""
+        for listener in self._listeners:
+            listener.close()
+            await listener.wait_closed()
+        self._listeners = []
+        connections = list(self.connections)
+        for connection in connections:
+            connection.close()
+        await asyncio.gather(*(connection.wait_closed() for connection in connections), return_exceptions=True)
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start(self) -> None:
+        """Start listening on every device address; returns once all ports are bound."""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="simulated-ssh", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._listen(), self._loop).result()
+        self.logger.info(f"Simulated SSH network listening on {len(self.ports)} addresses")
+
+    def stop(self) -> None:
+        """Close every listener and stop the background event loop."""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
@@ -0,0 +1,45 @@
+"""The single-pass parsers in fast_parser.py must return exactly what TextFSM does with the built-in templates."""
+import glob
+import json
+import os
+import pytest
+from bench_parser import GOLDEN_DIR, GOLDEN_PARSERS, large_cdp_output, parse_textfsm
+from parser import Parser, DEFAULT_TEMPLATES
+from simulator import SimulatedNetwork
+
+GOLDEN_SAMPLES = sorted(glob.glob(os.path.join(GOLDEN_DIR, "*.txt")))
+COMMANDS = {'version': 'show version', 'cdp': 'show cdp neighbors detail'}
+
+def load_golden(path):
+    """Return a golden sample's output and its expected rows."""
+    # newline='' keeps CRLF samples intact, as Netmiko can return them
+    with open(path, newline='') as f:
+        output = f.read()
+    with open(path[:-len(".txt")] + ".json") as f:
+        return output, json.load(f)
+
+@pytest.mark.parametrize('name', sorted(DEFAULT_TEMPLATES))
+def test_built_in_templates_use_fast_parsers(name):
+    # An edited template falls back to TextFSM; update fast_parser.py and TEMPLATE_DIGESTS with it
+    assert name in Parser().fast_parsers, f"{DEFAULT_TEMPLATES[name]} no longer matches its fast parser digest"
+
+@pytest.mark.parametrize('path', GOLDEN_SAMPLES, ids=os.path.basename)
+def test_golden_corpus(path):
+    template_name, fast_parser = GOLDEN_PARSERS[os.path.basename(path).split("_", 1)[0]]
+    output, expected = load_golden(path)
+    assert parse_textfsm(template_name, output) == expected
+    assert fast_parser(output) == expected
+
+def test_large_cdp_output():
+    output = large_cdp_output(500)
+    fast = Parser()
+    textfsm_only = Parser()
+    textfsm_only.fast_parsers = {}
+    assert fast.parse_cdp_neighbors(output) == textfsm_only.parse_cdp_neighbors(output)
+
+def test_simulated_outputs():
+    network = SimulatedNetwork.generate(50, multihomed=0.2, phones=0.2)
+    for outputs in network.outputs.values():
+        for kind, (template_name, fast_parser) in GOLDEN_PARSERS.items():
+            output = outputs[COMMANDS[kind]]
+            assert fast_parser(output) == parse_textfsm(template_name, output)
@@ -0,0 +1,33 @@
+"""Device identity: serials identify devices, names only those without a serial."""
+from identity import IdentityIndex, identity_keys
+
+def test_serial_is_the_identity_when_known():
+    assert identity_keys('Switch', 'Switch', 'fdo123') == ['serial:FDO123']
+    assert identity_keys('core-sw01(FOX456)') == ['serial:FOX456']
+    assert identity_keys('Switch.example.com', 'Switch') == ['name:switch.example.com', 'name:switch']
+
+def test_default_names_do_not_collapse_devices():
+    index = IdentityIndex()
+    assert index.claim('10.0.0.1', identity_keys('Switch')) is None
+    assert index.register('10.0.0.1', identity_keys('Switch', 'Switch', 'FDO1')) is None
+    # Another unconfigured box with the same default name is still crawled
+    assert index.claim('10.0.0.2', identity_keys('Switch')) is None
+    assert index.register('10.0.0.2', identity_keys('Switch', 'Switch', 'FDO2')) is None
+    assert len(index) == 2
+
+def test_second_address_is_merged_by_serial():
+    index = IdentityIndex()
+    index.claim('10.0.0.1', identity_keys('core-sw01'))
+    index.register('10.0.0.1', identity_keys('core-sw01', 'core-sw01', 'FDO1'))
+    assert index.claim('172.16.0.1', identity_keys('core-sw01')) is None
+    assert index.register('172.16.0.1', identity_keys('core-sw01', 'core-sw01', 'FDO1')) == '10.0.0.1'
+    assert index.addresses('172.16.0.1') == {'10.0.0.1', '172.16.0.1'}
+    assert len(index) == 1
+    # A CDP device ID carrying the serial matches before the device is crawled
+    assert index.claim('192.168.0.1', identity_keys('core-sw01(FDO1)')) == '10.0.0.1'
+
+def test_names_match_devices_without_a_serial():
+    index = IdentityIndex()
+    index.claim('10.0.0.1', identity_keys('edge-rtr'))
+    index.register('10.0.0.1', identity_keys('edge-rtr', 'edge-rtr'))
+    assert index.claim('10.0.0.9', identity_keys('edge-rtr')) == '10.0.0.1'
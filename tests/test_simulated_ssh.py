@@ -0,0 +1,79 @@
+"""Crawls with both engines against SimulatedSSHNetwork, the in-process SSH stand-in from simulator.py."""
+import gc
+import os
+import threading
+import pytest
+import yaml
+from async_crawler import AsyncCDPCrawler
+from crawler import CDPCrawler
+from data import IN_PROGRESS, RUN_COMPLETED, RUN_STOPPED
+from simulator import SimulatedNetwork, SimulatedSSHNetwork
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.yaml')
+ENGINES = [CDPCrawler, AsyncCDPCrawler]
+
+@pytest.fixture
+def network():
+    return SimulatedNetwork.generate(40, phones=0.2, loopback=True)
+
+@pytest.fixture
+def ssh_network(network):
+    service = SimulatedSSHNetwork(network, failure_rate=0.2, seed=1)
+    service.start()
+    yield service
+    service.stop()
+
+@pytest.fixture
+def config(tmp_path, monkeypatch, network, ssh_network):
+    # The crawler writes its log file under ./logs
+    monkeypatch.chdir(tmp_path)
+    with open(CONFIG_PATH, 'r') as f:
+        config = yaml.safe_load(f)
+    config['database']['path'] = str(tmp_path / 'inventory.db')
+    config['raw_store'] = {'path': str(tmp_path / 'raw_outputs')}
+    config['ssh_ports'] = dict(ssh_network.ports)
+    config['seed_device'].update(host=network.seed_ip, port=ssh_network.ports[network.seed_ip])
+    # The simulated platforms all map to cisco_ios; autodetect would probe for the rest
+    config['profiles']['autodetect'] = False
+    config['crawler'].update(retry_count=5, retry_delay=0.01, timeout=10, max_threads=8, max_sessions=20)
+    return config
+
+def cdp_entries(network):
+    """Return the number of CDP neighbor entries the simulated devices report."""
+    return sum(outputs['show cdp neighbors detail'].count('Device ID:') for outputs in network.outputs.values())
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_crawl_stores_every_device_and_link(engine, config, network, ssh_network):
+    crawler = engine(CONFIG_PATH, config)
+    crawler.start()
+
+    db = crawler.db_manager
+    assert db.count_devices() == len(network)
+    assert len(list(db.iter_links())) == cdp_entries(network)
+    assert db.list_runs()[0]['status'] == RUN_COMPLETED
+    assert db.list_runs()[0]['devices'] == len(network)
+    # Dropped logins were retried until every device was reached
+    assert ssh_network.failed_logins > 0
+    assert not db.frontier_counts().get(IN_PROGRESS)
+    db.close()
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_stop_mid_crawl_is_clean(engine, config, ssh_network, caplog):
+    ssh_network.latency = 0.2
+    crawler = engine(CONFIG_PATH, config)
+    stopper = threading.Timer(0.5, lambda: setattr(crawler, 'is_running', False))
+    stopper.start()
+    try:
+        crawler.start()
+    finally:
+        stopper.cancel()
+    # Tasks whose exceptions nobody retrieved are only reported once collected
+    gc.collect()
+
+    db = crawler.db_manager
+    assert db.list_runs()[0]['status'] == RUN_STOPPED
+    assert db.count_devices() < len(ssh_network.ports)
+    messages = [record.getMessage() for record in caplog.records]
+    assert not [message for message in messages
+                if 'cannot schedule new futures' in message or 'never retrieved' in message]
+    db.close()
@@ -0,0 +1,153 @@
+import logging
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func
+from data import DatabaseManager, Device, DeviceAddress, Link, IN_CHUNK
+
+def _chunks(values: List[str]) -> Iterable[List[str]]:
+    """Split a list into pieces small enough for one IN clause."""
+    for start in range(0, len(values), IN_CHUNK):
+        yield values[start:start + IN_CHUNK]
+
+class Topology:
+    """Answers neighbor, path and degree queries from the indexed links table."""
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.session = db_manager.session
+        self.logger = logging.getLogger(__name__)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Return the primary IP of a device given its IP, hostname or CDP device ID."""
+        alias = self.session.query(DeviceAddress.device_ip).filter(DeviceAddress.address == name).first()
+        if alias:
+            return alias.device_ip
+        device = (self.session.query(Device.ip)
+                  .filter((Device.ip == name) | (Device.hostname == name)).first())
+        if device:
+            return device.ip
+        link = (self.session.query(Link.remote_ip)
+                .filter((Link.remote_ip == name) | (Link.remote_device_id == name)).first())
+        return link.remote_ip if link else None
+
+    def _primaries(self, ips: Iterable[str]) -> Dict[str, str]:
+        """Map any alias addresses among ips to their device's primary IP."""
+        ips = list(set(ips))
+        primaries = {}
+        for chunk in _chunks(ips):
+            rows = self.session.query(DeviceAddress.address, DeviceAddress.device_ip).filter(
+                DeviceAddress.address.in_(chunk))
+            primaries.update({row.address: row.device_ip for row in rows})
+        return {ip: primaries.get(ip, ip) for ip in ips}
+
+    def _addresses(self, ips: List[str]) -> Dict[str, str]:
+        """Map every known address of the given devices back to its primary IP."""
+        addresses = {ip: ip for ip in ips}
+        for chunk in _chunks(ips):
+            rows = self.session.query(DeviceAddress.address, DeviceAddress.device_ip).filter(
+                DeviceAddress.device_ip.in_(chunk))
+            addresses.update({row.address: row.device_ip for row in rows})
+        return addresses
+
+    def hostnames(self, ips: Iterable[str]) -> Dict[str, str]:
+        """Return the stored hostname for each IP that has one."""
+        ips = list(set(ips))
+        names = {}
+        for chunk in _chunks(ips):
+            rows = self.session.query(Device.ip, Device.hostname).filter(Device.ip.in_(chunk))
+            names.update({row.ip: row.hostname for row in rows})
+        return names
+
+    def neighbors(self, ip: str) -> List[Dict[str, Any]]:
+        """Return the links of a device, including those only seen from the other side."""
+        result = []
+        outgoing = self.session.query(Link).filter(Link.local_ip == ip).all()
+        primaries = self._primaries(link.remote_ip for link in outgoing)
+        seen = set()
+        for link in outgoing:
+            remote = primaries.get(link.remote_ip, link.remote_ip)
+            seen.add(remote)
+            result.append({
+                'local_interface': link.local_interface,
+                'remote_ip': remote,
+                'remote_device_id': link.remote_device_id,
+                'remote_interface': link.remote_interface,
+                'remote_platform': link.remote_platform
+            })
+
+        addresses = list(self._addresses([ip]))
+        incoming_ips = set()
+        for chunk in _chunks(addresses):
+            incoming = self.session.query(Link).filter(Link.remote_ip.in_(chunk))
+            for link in incoming:
+                if link.local_ip in seen:
+                    continue
+                incoming_ips.add(link.local_ip)
+                result.append({
+                    'local_interface': link.remote_interface,
+                    'remote_ip': link.local_ip,
+                    'remote_device_id': '',
+                    'remote_interface': link.local_interface,
+                    'remote_platform': ''
+                })
+        hostnames = self.hostnames(incoming_ips)
+        for entry in result:
+            if not entry['remote_device_id']:
+                entry['remote_device_id'] = hostnames.get(entry['remote_ip'], '')
+        return result
+
+    def degree(self, ip: str) -> int:
+        """Return the number of distinct neighbors of a device."""
+        return len({entry['remote_ip'] for entry in self.neighbors(ip)})
+
+    def top_degrees(self, limit: int = 20) -> List[Tuple[str, str, int]]:
+        """Return (ip, hostname, link count) for the most connected crawled devices."""
+        links = func.count(Link.id).label('links')
+        rows = (self.session.query(Link.local_ip, Device.hostname, links)
+                .outerjoin(Device, Device.ip == Link.local_ip)
+                .group_by(Link.local_ip, Device.hostname)
+                .order_by(links.desc())
+                .limit(limit))
+        return [(row.local_ip, row.hostname or '', row.links) for row in rows]
+
+    def _adjacent(self, ips: List[str]) -> Dict[str, Set[str]]:
+        """Return the undirected neighbors of each device, by primary IP."""
+        adjacency: Dict[str, Set[str]] = {ip: set() for ip in ips}
+        edges = []
+        for chunk in _chunks(ips):
+            rows = self.session.query(Link.local_ip, Link.remote_ip).filter(Link.local_ip.in_(chunk))
+            edges.extend((row.local_ip, row.remote_ip) for row in rows)
+
+        addresses = self._addresses(ips)
+        for chunk in _chunks(list(addresses)):
+            rows = self.session.query(Link.remote_ip, Link.local_ip).filter(Link.remote_ip.in_(chunk))
+            edges.extend((addresses[row.remote_ip], row.local_ip) for row in rows)
+
+        primaries = self._primaries(remote for _, remote in edges)
+        for local, remote in edges:
+            remote = primaries.get(remote, remote)
+            if remote and remote != local:
+                adjacency[local].add(remote)
+        return adjacency
+
+    def path(self, source: str, target: str, max_hops: int = 32) -> Optional[List[str]]:
+        """Return a shortest path of primary IPs between two devices, or None."""
+        if source == target:
+            return [source]
+        parents: Dict[str, Optional[str]] = {source: None}
+        level = [source]
+        for _ in range(max_hops):
+            if not level:
+                break
+            next_level = []
+            for ip, neighbors in self._adjacent(level).items():
+                for neighbor in neighbors:
+                    if neighbor in parents:
+                        continue
+                    parents[neighbor] = ip
+                    if neighbor == target:
+                        path = [target]
+                        while parents[path[-1]] is not None:
+                            path.append(parents[path[-1]])
+                        return path[::-1]
+                    next_level.append(neighbor)
+            level = next_level
+        return None